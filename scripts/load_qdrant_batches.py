@@ -12,7 +12,7 @@ from tqdm import tqdm
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from src.vector_store.qdrant_utils import qdrant_client, COLLECTION_NAME, generate_question_id, PointStruct
-from src.llm.embedder import get_embedding
+from src.llm.embedder import embed_texts
 
 def load_data_in_batches(file_path, batch_size=50):
     """Load data into Qdrant in batches."""
@@ -31,14 +31,12 @@ def load_data_in_batches(file_path, batch_size=50):
         print(f"\n🔄 Processing batch {batch_num + 1}/{total_batches} (records {start_idx + 1}-{end_idx})")
         
         batch_df = df.iloc[start_idx:end_idx]
-        points = []
+        texts, ids, payloads = [], [], []
         
-        for idx, row in tqdm(batch_df.iterrows(), total=len(batch_df), desc="Creating embeddings"):
+        for idx, row in tqdm(batch_df.iterrows(), total=len(batch_df), desc="Preparing rows"):
             try:
                 question_id = generate_question_id(row)
-                
                 text_for_embedding = f"{row['Question']} {row.get('Notes', '')} {row.get('Topic', '')} {row.get('Difficulty', '')}"
-                embedding = get_embedding(text_for_embedding)
                 
                 payload = {
                     "uuid": question_id,
@@ -54,11 +52,21 @@ def load_data_in_batches(file_path, batch_size=50):
                     "difficulty": row.get('Difficulty', 'Medium')
                 }
                 
-                points.append(PointStruct(id=question_id, vector=embedding, payload=payload))
-                
             except Exception as e:
                 print(f"⚠️ Error processing row {idx}: {e}")
                 continue
+            
+            texts.append(text_for_embedding)
+            ids.append(question_id)
+            payloads.append(payload)
+        
+        # Whole batch in one encode call instead of one forward pass per row
+        print(f"🧮 Creating {len(texts)} embeddings...")
+        embeddings = embed_texts(texts, batch_size=64) if texts else []
+        points = [
+            PointStruct(id=question_id, vector=embedding, payload=payload)
+            for question_id, embedding, payload in zip(ids, embeddings, payloads)
+        ]
         
         if points:
             try:
@@ -7,5 +7,7 @@ if __name__ == "__main__":
         "src.api.main:app",
         host="0.0.0.0",
         port=port,
+        loop="uvloop",
+        http="httptools",
         reload=False
     ) 
\ No newline at end of file
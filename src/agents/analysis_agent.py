@@ -1,6 +1,7 @@
-from src.db.quiz_session_utils import quiz_sessions_collection
+from src.db.quiz_session_utils import get_quiz_sessions_collection, mark_quiz_completed
 from collections import defaultdict
 from src.llm.model_router import route_llm
+from src.agents.analysis_cache import get_cached_analysis, invalidate_user_analysis, set_cached_analysis
 
 def aggregate_topic_performance(sessions):
     topic_stats = defaultdict(lambda: {"total": 0, "correct": 0})
@@ -27,11 +28,25 @@ def summarize_performance(summary_input):
     return getattr(response, "content", str(response))
 
 def analyze_user(email: str, day: int = None):
+    cached = get_cached_analysis("analyze_user", email, day)
+    if cached is not None:
+        return cached
+    result = _analyze_user(email, day)
+    set_cached_analysis("analyze_user", email, day, result)
+    return result
+
+def complete_quiz_session(email: str, day: int):
+    """Mark the day's quiz completed - completed sessions feed the cached analyses, so drop them"""
+    session = mark_quiz_completed(email, day)
+    invalidate_user_analysis(email)
+    return session
+
+def _analyze_user(email: str, day: int = None):
     if day is not None:
-        sessions = list(quiz_sessions_collection.find({"email": email, "day": day, "completed": True}))
+        sessions = list(get_quiz_sessions_collection().find({"email": email, "day": day, "completed": True}))
         analysis_type = "session"
     else:
-        sessions = list(quiz_sessions_collection.find({"email": email, "completed": True}))
+        sessions = list(get_quiz_sessions_collection().find({"email": email, "completed": True}))
         analysis_type = "overall"
     if not sessions:
         return {"error": "No completed sessions found."}
@@ -0,0 +1,34 @@
+"""
+In-process TTL cache for per-user analysis results keyed by (email, day)
+"""
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+ANALYSIS_CACHE_TTL = int(os.getenv("ANALYSIS_CACHE_TTL", "300"))  # seconds
+ANALYSIS_CACHE_MAXSIZE = int(os.getenv("ANALYSIS_CACHE_MAXSIZE", "10000"))  # users
+
+# email -> {(namespace, day): (expires_at, result)}
+_cache: Dict[str, Dict] = {}
+_lock = threading.Lock()
+
+def get_cached_analysis(namespace: str, email: str, day: Optional[int]) -> Optional[Dict]:
+    """Return a cached result if present and not expired"""
+    with _lock:
+        entry = _cache.get(email, {}).get((namespace, day))
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+def set_cached_analysis(namespace: str, email: str, day: Optional[int], result: Dict) -> None:
+    """Store a result for (email, day), evicting the oldest user when full"""
+    with _lock:
+        if email not in _cache and len(_cache) >= ANALYSIS_CACHE_MAXSIZE:
+            _cache.pop(next(iter(_cache)))
+        _cache.setdefault(email, {})[(namespace, day)] = (time.monotonic() + ANALYSIS_CACHE_TTL, result)
+
+def invalidate_user_analysis(email: str) -> None:
+    """Drop every cached result for a user - per-day and overall analyses both change on completion"""
+    with _lock:
+        _cache.pop(email, None)
@@ -1,12 +1,12 @@
-from src.db.quiz_session_utils import quiz_sessions_collection
+from src.db.quiz_session_utils import get_quiz_sessions_collection
 from collections import defaultdict
 from src.llm.model_router import route_llm
 
 def fetch_sessions(email: str, day: int = None):
     if day is not None:
-        sessions = list(quiz_sessions_collection.find({"email": email, "day": day, "completed": True}))
+        sessions = list(get_quiz_sessions_collection().find({"email": email, "day": day, "completed": True}))
     else:
-        sessions = list(quiz_sessions_collection.find({"email": email, "completed": True}))
+        sessions = list(get_quiz_sessions_collection().find({"email": email, "completed": True}))
     return sessions
 
 def aggregate_topic_performance(sessions):
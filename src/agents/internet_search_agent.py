@@ -1,3 +1,5 @@
+import asyncio
+import os
 from langgraph.graph import StateGraph, END
 from typing import TypedDict, List, Optional
 from src.agents.internet_search_tools import search_internet, search_with_context
@@ -108,6 +110,15 @@ def build_internet_search_graph():
     
     return builder.compile()
 
+def _build_search_inputs(query: str, use_llm: bool) -> InternetSearchState:
+    return {
+        "query": query,
+        "context": "",  # No context needed for simple queries
+        "use_llm": use_llm,
+        "model_type": "gemini",  # Default to Gemini
+        "model_name": "gemini-1.5-flash"  # Default model
+    }
+
 # Convenience function to run the graph
 def run_internet_search(query: str, use_llm: bool = False):
     """
@@ -121,17 +132,9 @@ def run_internet_search(query: str, use_llm: bool = False):
         dict: Search results and optional LLM enhancement
     """
     try:
-        graph = build_internet_search_graph()
+        inputs = _build_search_inputs(query, use_llm)
         
-        inputs = {
-            "query": query,
-            "context": "",  # No context needed for simple queries
-            "use_llm": use_llm,
-            "model_type": "gemini",  # Default to Gemini
-            "model_name": "gemini-1.5-flash"  # Default model
-        }
-        
-        result = graph.invoke(inputs)
+        result = internet_search_graph.invoke(inputs)
         return result.get("response", {"error": "No response generated"})
         
     except Exception as e:
@@ -139,4 +142,21 @@ def run_internet_search(query: str, use_llm: bool = False):
         return {"error": f"Graph execution failed: {str(e)}"}
 
 # Create a global instance for easy access
-internet_search_graph = build_internet_search_graph() 
\ No newline at end of file
+internet_search_graph = build_internet_search_graph()
+
+# Caps concurrent SerperDev searches per worker to stay under the API rate limit
+SERPER_SEM = asyncio.Semaphore(int(os.getenv("SERPER_CONCURRENCY", "8")))
+
+async def run_internet_search_async(query: str, use_llm: bool = False):
+    """
+    Async variant of run_internet_search for use from async endpoints.
+    Reuses the compiled global graph; LangGraph runs the sync nodes in its executor.
+    """
+    try:
+        async with SERPER_SEM:
+            result = await internet_search_graph.ainvoke(_build_search_inputs(query, use_llm))
+        return result.get("response", {"error": "No response generated"})
+        
+    except Exception as e:
+        print(f"❌ Error running internet search graph: {e}")
+        return {"error": f"Graph execution failed: {str(e)}"}
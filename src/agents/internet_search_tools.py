@@ -1,8 +1,16 @@
 import os
 import requests
+from requests.adapters import HTTPAdapter
 import json
 from typing import List, Dict, Optional
 
+SERPER_URL = "https://google.serper.dev/search"
+SERPER_POOL_SIZE = int(os.getenv("SERPER_POOL_SIZE", "20"))
+
+# One keep-alive session per process - repeat searches reuse the TLS connection
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=SERPER_POOL_SIZE))
+
 def search_internet(query: str, num_results: int = 4) -> List[Dict]:
     """
     Search the internet using SerperDev API and return top results
@@ -19,7 +27,6 @@ def search_internet(query: str, num_results: int = 4) -> List[Dict]:
         if not api_key:
             raise ValueError("SERPERDEV_API_KEY not found in environment variables")
         
-        url = "https://google.serper.dev/search"
         headers = {
             "X-API-KEY": api_key,
             "Content-Type": "application/json"
@@ -30,7 +37,7 @@ def search_internet(query: str, num_results: int = 4) -> List[Dict]:
             "num": num_results
         }
         
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
+        response = _session.post(SERPER_URL, headers=headers, json=payload, timeout=(2, 30))
         response.raise_for_status()
         
         data = response.json()
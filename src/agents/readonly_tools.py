@@ -1,12 +1,12 @@
 import logging
-from src.db.quiz_session_utils import quiz_sessions_collection
+from src.db.quiz_session_utils import get_quiz_sessions_collection
 from collections import defaultdict
 
 def fetch_sessions(email: str, limit: int = None, sort_by: str = "session_date", order: str = "desc"):
     logging.info(f"[TOOL CALL] fetch_sessions called with: email={email}, limit={limit}, sort_by={sort_by}, order={order}")
     query = {"user_email": email}
     logging.info(f"[MONGO QUERY] quiz_sessions_collection.find({query})")
-    cursor = quiz_sessions_collection.find(query)
+    cursor = get_quiz_sessions_collection().find(query)
     if sort_by:
         cursor = cursor.sort(sort_by, -1 if order == "desc" else 1)
     if limit:
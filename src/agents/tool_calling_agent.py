@@ -1,6 +1,15 @@
 from src.agents.analysis_tools import fetch_sessions, aggregate_topic_performance, generate_summary, suggest_next_steps
+from src.agents.analysis_cache import get_cached_analysis, set_cached_analysis
 
 def run_agent(email: str, day: int = None):
+    cached = get_cached_analysis("run_agent", email, day)
+    if cached is not None:
+        return cached
+    result = _run_agent(email, day)
+    set_cached_analysis("run_agent", email, day, result)
+    return result
+
+def _run_agent(email: str, day: int = None):
     sessions = fetch_sessions(email, day)
     if not sessions:
         return {"error": "No completed sessions found."}
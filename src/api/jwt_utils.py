@@ -1,4 +1,7 @@
 import jwt
+import hashlib
+import threading
+import time
 from datetime import datetime, timedelta
 import os
 from typing import Optional, Dict
@@ -6,6 +9,11 @@ from fastapi import HTTPException, status
 
 ALGORITHM = "HS256"
 
+# token digest -> (user_info, exp); tokens are immutable until they expire
+_USER_INFO_CACHE: Dict[bytes, tuple] = {}
+_USER_INFO_CACHE_MAXSIZE = 10000
+_user_info_lock = threading.Lock()
+
 def decode_access_token(token: str):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -56,12 +64,31 @@ def decode_access_token(token: str):
             detail=f"Token verification failed: {str(e)}"
         )
 
+def get_token_expiry(token: str) -> Optional[float]:
+    """
+    exp claim (epoch seconds) of the token without verification, or None when
+    it is missing or the token can't be decoded
+    """
+    cached = _USER_INFO_CACHE.get(hashlib.blake2b(token.encode(), digest_size=16).digest())
+    if cached:
+        return cached[1]
+    try:
+        exp = jwt.decode(token, options={"verify_signature": False}).get("exp")
+    except jwt.InvalidTokenError:
+        return None
+    return exp if isinstance(exp, (int, float)) else None
+
 def get_user_from_jwt(token: str) -> Dict:
     """
     Extract user information from JWT token (without verification)
     Only extracts user_id - the only field we actually need
     """
     try:
+        cache_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        cached = _USER_INFO_CACHE.get(cache_key)
+        if cached and cached[1] > time.time():
+            return dict(cached[0])
+        
         # Decode JWT without verification (since we're using anon key approach)
         payload = jwt.decode(token, options={"verify_signature": False})
         
@@ -70,7 +97,15 @@ def get_user_from_jwt(token: str) -> Dict:
             "user_id": payload.get("sub")  # User ID from JWT
         }
         
-        return user_info
+        # Cache until the token expires
+        exp = payload.get("exp")
+        if user_info["user_id"] and isinstance(exp, (int, float)) and exp > time.time():
+            with _user_info_lock:
+                if len(_USER_INFO_CACHE) >= _USER_INFO_CACHE_MAXSIZE:
+                    _USER_INFO_CACHE.pop(next(iter(_USER_INFO_CACHE)))
+                _USER_INFO_CACHE[cache_key] = (user_info, exp)
+        
+        return dict(user_info)
         
     except Exception as e:
         # If JWT decode fails, return minimal info
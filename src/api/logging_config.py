@@ -0,0 +1,32 @@
+"""
+Logging setup - handlers write through a queue so request code never blocks on stderr
+"""
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+def setup_logging() -> logging.handlers.QueueListener:
+    """
+    Route the root logger through a QueueHandler and start a listener
+    thread that drains it to stderr. Returns the listener so it can be stopped.
+    """
+    log_queue = queue.Queue(-1)
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    root = logging.getLogger()
+    # Replace handlers installed by earlier basicConfig calls
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(LOG_LEVEL)
+
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    return listener
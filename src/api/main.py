@@ -1,38 +1,116 @@
 from dotenv import load_dotenv
 load_dotenv()
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from contextlib import asynccontextmanager
+from types import MappingProxyType
+from typing import Dict, List, Tuple, get_origin
+import orjson
 from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
-from src.rag.graph import build_rag_graph
+from src.rag.graph import get_rag_graph
+from src.vector_store.qdrant_utils import close_clients as close_qdrant_clients, on_collection_updated
+from src.llm.embedder import get_embedder
+from src.llm.embed_batcher import EmbedBatcher
+from src.api.logging_config import setup_logging
 
-from src.services.adaptive_quiz_service import adaptive_quiz_service
 from src.models.quiz_models import AdaptiveQuizRequest, AdaptiveQuizResponse
 from src.services.learning_path_optimizer import learning_path_optimizer
-from src.models.learning_path_models import LearningPathRequest, LearningPathResponse
-from src.services.gemini_learning_enhancer import gemini_enhancer
+from src.models.learning_path_models import EnhancedRecommendations, LearningPathRequest, LearningPathResponse
+from src.services.semantic_cache import semantic_cache
+from src.services.query_batcher import QueryBatcher
 
+logger = logging.getLogger(__name__)
 
-from src.agents.internet_search_agent import run_internet_search
+# Cached responses are built from the collection - drop them when it changes
+on_collection_updated(semantic_cache.invalidate)
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log_listener = setup_logging()
+    # Heavy init happens once per worker before the first request is served
+    logger.info("Warming up RAG graph and embedding model")
+    app.state.rag_graph = await run_in_threadpool(get_rag_graph)
+    await run_in_threadpool(get_embedder)
+    app.state.query_batcher = QueryBatcher(app.state.rag_graph)
+    app.state.query_batcher.start()
+    app.state.embed_batcher = EmbedBatcher()
+    app.state.embed_batcher.start()
+    logger.info("Warm-up complete")
+    yield
+    await app.state.embed_batcher.stop()
+    await app.state.query_batcher.stop()
+    await close_qdrant_clients()
+    log_listener.stop()
+
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+
+# CORS origins - local dev servers are matched by one precompiled regex
+CORS_ALLOWED_ORIGINS = (
+    "https://skillquest.pages.dev",  # SkillQuest frontend
+)
+CORS_LOCALHOST_ORIGIN_REGEX = r"^http://localhost:(8080|3000|5173|4173)$"  # Frontend dev, Vite and preview ports
 
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        "http://localhost:8080",      # Your frontend dev server
-        "http://localhost:3000",      # Alternative frontend port
-        "http://localhost:5173",      # Vite default port
-        "http://localhost:4173",      # Your production domain
-        "https://skillquest.pages.dev"  # SkillQuest frontend
-    ],
+    allow_origins=list(CORS_ALLOWED_ORIGINS),
+    allow_origin_regex=CORS_LOCALHOST_ORIGIN_REGEX,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["Content-Type", "Authorization", "accept", "apikey", "accept-profile"]
 )
 
-rag_graph = build_rag_graph()
+# Fields every enhanced_recommendations payload must expose and their container type,
+# read once from the schema - List[...] fields are lists, nested models are dicts
+_ENH_FIELD_KIND = MappingProxyType({
+    name: list if get_origin(field.annotation) is list else dict
+    for name, field in EnhancedRecommendations.model_fields.items()
+})
+
+# Read-only baseline used when the LLM returns no enhanced recommendations
+_EMPTY_ENH_TEMPLATE = MappingProxyType({
+    field: kind() for field, kind in _ENH_FIELD_KIND.items()
+})
+
+def _merge_enhanced_recommendations(target: Dict, source: Dict, seen_items: Dict[str, set]) -> None:
+    """
+    Merge one enhanced_recommendations payload into target in place.
+    seen_items carries each list field's dedup keys across calls so they are built once.
+    """
+    # Callers have already imported the enhancer, so this is a module-cache lookup
+    from src.services.gemini_learning_enhancer import item_key
+    
+    for key, value in source.items():
+        current = target.get(key)
+        if isinstance(value, list) and isinstance(current, list):
+            # Merge lists, avoiding duplicates
+            keys = seen_items.get(key)
+            if keys is None:
+                keys = seen_items[key] = {item_key(item) for item in current}
+            for item in value:
+                dedup_key = item_key(item)
+                if dedup_key not in keys:
+                    keys.add(dedup_key)
+                    current.append(item)
+        elif isinstance(value, dict) and isinstance(current, dict):
+            # Merge dictionaries
+            current.update(value)
+        else:
+            # Add new fields and replace non-list/dict values
+            target[key] = value
+
+async def _ensure_milestones(milestones, gemini_enhancer) -> List[Dict]:
+    """Validate LLM or rule-based milestones; empty input goes straight to the fallback, which is already well-formed"""
+    if not milestones:
+        return gemini_enhancer._get_fallback_milestones({})
+    return await asyncio.to_thread(gemini_enhancer._validate_milestones, milestones)
 
 @app.get("/")
 async def root():
@@ -49,16 +127,32 @@ class QueryRequest(BaseModel):
 class QueryResponse(BaseModel):
     response: dict
 
+# Model selection is the same for every /query call
+_RAG_DEFAULTS = {"model_type": "gemini", "model_name": "gemini-1.5-flash"}
 
 
 @app.post("/query", response_model=QueryResponse)
-def query_endpoint(request: QueryRequest):
+async def query_endpoint(request: QueryRequest):
     try:
-        inputs = request.dict()
-        inputs["model_type"] = "gemini"
-        inputs["model_name"] = "gemini-1.5-flash"
-        result = rag_graph.invoke(inputs)
-        return {"response": result.get("response", {})}
+        # Near-duplicate queries reuse the earlier RAG response
+        namespace = f"query:{request.use_llm}"
+        # Concurrent queries share one encode call
+        embedding = await app.state.embed_batcher.submit(request.query)
+        cached = semantic_cache.lookup(namespace, embedding)
+        if cached is not None:
+            return ORJSONResponse(cached)
+
+        inputs = {
+            **_RAG_DEFAULTS,
+            "query": request.query,
+            "use_llm": request.use_llm,
+            "embedding": embedding.tolist()
+        }
+        result = await app.state.query_batcher.submit(inputs)
+        response = {"response": result.get("response", {})}
+        semantic_cache.store(namespace, embedding, response)
+        # We assemble this dict ourselves - skip the response_model re-validation; the model still documents the schema
+        return ORJSONResponse(response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -66,9 +160,24 @@ def query_endpoint(request: QueryRequest):
 
 
 
+# Health probes hit this many times per second - format the timestamp once per second
+_TS_CACHE = {"t": 0, "s": ""}
+
+def _now_iso() -> str:
+    t = int(time.time())
+    if t != _TS_CACHE["t"]:
+        _TS_CACHE["s"] = datetime.fromtimestamp(t, tz=timezone.utc).isoformat()
+        _TS_CACHE["t"] = t
+    return _TS_CACHE["s"]
+
 @app.get("/health")
-def health_check():
-    return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
+async def health_check():
+    return {"status": "healthy", "timestamp": _now_iso()}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Semantic cache size and hit rate for /query and /quiz-detail"""
+    return semantic_cache.stats()
 
 # === Quiz Detail Endpoint (Internet Search) ===
 
@@ -77,7 +186,7 @@ class QuizDetailRequest(BaseModel):
     use_llm: bool = False
 
 @app.post("/quiz-detail")
-def get_quiz_detail(request: QuizDetailRequest):
+async def get_quiz_detail(request: QuizDetailRequest):
     """
     Get internet search results for quiz questions using LangGraph and SerperDev
     """
@@ -85,7 +194,16 @@ def get_quiz_detail(request: QuizDetailRequest):
         if not request.query or not request.query.strip():
             raise HTTPException(status_code=400, detail="Query cannot be empty")
         
-        result = run_internet_search(
+        namespace = f"quiz_detail:{request.use_llm}"
+        embedding = await app.state.embed_batcher.submit(request.query.strip())
+        cached = semantic_cache.lookup(namespace, embedding)
+        if cached is not None:
+            return cached
+        
+        # Imported on first use - pulls in the SerperDev/LangGraph search stack
+        from src.agents.internet_search_agent import run_internet_search_async
+        
+        result = await run_internet_search_async(
             query=request.query.strip(),
             use_llm=request.use_llm
         )
@@ -93,37 +211,134 @@ def get_quiz_detail(request: QuizDetailRequest):
         if "error" in result:
             raise HTTPException(status_code=500, detail=result["error"])
         
+        semantic_cache.store(namespace, embedding, result)
         return result
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error in quiz-detail endpoint: {e}")
+        logger.exception("Quiz detail request failed")
         raise HTTPException(status_code=500, detail=f"Failed to fetch quiz details: {str(e)}")
 
 # === Adaptive Quiz Questions Endpoint ===
 
 @app.post("/quiz/adaptive-questions", response_model=AdaptiveQuizResponse)
-def get_adaptive_quiz_questions(request: AdaptiveQuizRequest):
+async def get_adaptive_quiz_questions(request: AdaptiveQuizRequest):
     """
     Get adaptive quiz questions based on user's topic progress
     """
     try:
+        # Imported on first use - pulls in the Supabase client
+        from src.services.adaptive_quiz_service import adaptive_quiz_service
+        
         # Use the service to handle all the logic (user_id extracted from JWT)
-        result = adaptive_quiz_service.get_adaptive_quiz_questions(
+        quiz = run_in_threadpool(
+            adaptive_quiz_service.get_adaptive_quiz_questions,
             jwt_token=request.jwt_token,
             num_questions=request.num_questions,
             topic_requests=request.topic_requests
         )
+        if request.topic_requests or adaptive_quiz_service.topics_cache_fresh():
+            result = await quiz
+        else:
+            # Cold topics cache - fetch it while the service reads Supabase progress.
+            # The service then finds the list cached, or waits on this in-flight fetch
+            result, _ = await asyncio.gather(
+                quiz,
+                asyncio.to_thread(adaptive_quiz_service.get_all_available_topics)
+            )
         
-        return AdaptiveQuizResponse(**result)
+        # response_model validates and filters the service dict once on the way out
+        return result
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error in adaptive quiz endpoint: {e}")
+        logger.exception("Adaptive quiz request failed")
         raise HTTPException(status_code=500, detail=f"Failed to generate adaptive quiz: {str(e)}") 
 
+async def _build_base_dashboard(jwt_token: str) -> Tuple[Dict, Dict]:
+    """
+    Rule-based dashboard data and the user context the LLM enhancements read
+    """
+    # Extract user_id from JWT token
+    from src.api.jwt_utils import get_user_from_jwt
+    
+    user_info = get_user_from_jwt(jwt_token)
+    user_id = user_info.get("user_id")
+    
+    if not user_id:
+        raise HTTPException(
+            status_code=401, 
+            detail="Invalid JWT token: user_id not found"
+        )
+    
+    # Supabase progress and the skill catalog don't depend on each other - fetch them concurrently
+    from src.db.supabase_utils import get_user_topic_progress
+    user_progress, available_skills = await asyncio.gather(
+        asyncio.to_thread(get_user_topic_progress, user_id),
+        asyncio.to_thread(learning_path_optimizer.get_all_available_skills)
+    )
+    
+    if not user_progress:
+        # New user - create empty progress structure
+        current_progress = {
+            "strategy": "cold_start",
+            "overall_accuracy": 0,
+            "total_attempts": 0,
+            "total_correct": 0,
+            "topic_performance": {},
+            "topics": [],
+            "difficulties": ["easy"],
+            "is_new_user": True
+        }
+    else:
+        # Analyze existing progress
+        from src.services.adaptive_quiz_service import adaptive_quiz_service
+        current_progress = adaptive_quiz_service.analyze_user_progress(user_progress)
+    
+    # Use default user preferences (system decides)
+    user_preferences = {
+        "learning_style": "reading_writing",
+        "time_available": 60,
+        "focus_areas": []
+    }
+    
+    # Get base learning path recommendation (rule-based) - reuses the catalog cached above
+    learning_path = learning_path_optimizer.get_next_learning_recommendation(
+        user_id=user_id,
+        current_progress=current_progress,
+        user_preferences=user_preferences
+    )
+    
+    # Build base dashboard data
+    dashboard_data = {
+        "user_progress": {
+            "user_id": user_id,
+            "is_new_user": current_progress.get("is_new_user", False),
+            "progress_summary": current_progress
+        },
+        "next_skill": learning_path.get("next_skill") if learning_path else None,
+        "learning_path": learning_path.get("learning_path") if learning_path else None,
+        "available_skills": available_skills,
+        "milestones": learning_path.get("milestones") if learning_path else [],
+        "alternative_paths": learning_path.get("alternative_paths") if learning_path else [],
+        "total_estimated_time": learning_path.get("total_estimated_time") if learning_path else 0,
+        "confidence_score": learning_path.get("confidence_score") if learning_path else 0,
+        "enhancement_method": "rule_based"  # Default method
+    }
+    
+    # Create user context for LLM
+    user_context = {
+        "user_id": user_id,
+        "learning_style": user_preferences.get("learning_style", "reading_writing"),
+        "current_level": "beginner" if current_progress.get("is_new_user") else "intermediate",
+        "time_available": user_preferences.get("time_available", 60),
+        "career_goals": "general_knowledge",  # Can be enhanced later
+        "progress_summary": current_progress
+    }
+    return dashboard_data, user_context
+
 @app.post("/learning-path/dashboard", response_model=LearningPathResponse)
 async def get_learning_dashboard(
     request: LearningPathRequest
@@ -133,272 +348,207 @@ async def get_learning_dashboard(
     Get comprehensive learning dashboard - with optional LLM enhancement!
     """
     try:
-        # Extract user_id from JWT token
-        from src.api.jwt_utils import get_user_from_jwt
-        
-        user_info = get_user_from_jwt(request.jwt_token)
-        user_id = user_info.get("user_id")
-        
-        if not user_id:
-            raise HTTPException(
-                status_code=401, 
-                detail="Invalid JWT token: user_id not found"
-            )
-        
-        # Get user's current progress from Supabase
-        from src.db.supabase_utils import get_user_topic_progress
-        user_progress = get_user_topic_progress(user_id)
-        
-        if not user_progress:
-            # New user - create empty progress structure
-            current_progress = {
-                "strategy": "cold_start",
-                "overall_accuracy": 0,
-                "total_attempts": 0,
-                "total_correct": 0,
-                "topic_performance": {},
-                "topics": [],
-                "difficulties": ["easy"],
-                "is_new_user": True
-            }
-        else:
-            # Analyze existing progress
-            from src.services.adaptive_quiz_service import AdaptiveQuizService
-            quiz_service = AdaptiveQuizService()
-            current_progress = quiz_service.analyze_user_progress(user_progress)
-        
-        # Use default user preferences (system decides)
-        user_preferences = {
-            "learning_style": "reading_writing",
-            "time_available": 60,
-            "focus_areas": []
-        }
-        
-        # Get base learning path recommendation (rule-based)
-        learning_path = learning_path_optimizer.get_next_learning_recommendation(
-            user_id=user_id,
-            current_progress=current_progress,
-            user_preferences=user_preferences
-        )
+        # Imported on first use - pulls in the Gemini SDK and configures the client
+        from src.services.gemini_learning_enhancer import gemini_enhancer
         
-        # Get all available skills
-        available_skills = learning_path_optimizer.get_all_available_skills()
-        
-        # Build base dashboard data
-        dashboard_data = {
-            "user_progress": {
-                "user_id": user_id,
-                "is_new_user": current_progress.get("is_new_user", False),
-                "progress_summary": current_progress
-            },
-            "next_skill": learning_path.get("next_skill") if learning_path else None,
-            "learning_path": learning_path.get("learning_path") if learning_path else None,
-            "available_skills": available_skills,
-            "milestones": learning_path.get("milestones") if learning_path else [],
-            "alternative_paths": learning_path.get("alternative_paths") if learning_path else [],
-            "total_estimated_time": learning_path.get("total_estimated_time") if learning_path else 0,
-            "confidence_score": learning_path.get("confidence_score") if learning_path else 0,
-            "enhancement_method": "rule_based"  # Default method
-        }
+        dashboard_data, user_context = await _build_base_dashboard(request.jwt_token)
+        current_progress = dashboard_data["user_progress"]["progress_summary"]
+        available_skills = dashboard_data["available_skills"]
         
         # 🚀 ENHANCE WITH LLM IF REQUESTED!
         if request.llm:
             try:
-                print("🧠 Activating Gemini LLM enhancement...")
-                
-                # Create user context for LLM
-                user_context = {
-                    "user_id": user_id,
-                    "learning_style": user_preferences.get("learning_style", "reading_writing"),
-                    "current_level": "beginner" if current_progress.get("is_new_user") else "intermediate",
-                    "time_available": user_preferences.get("time_available", 60),
-                    "career_goals": "general_knowledge",  # Can be enhanced later
-                    "progress_summary": current_progress
-                }
+                # The five enhancement calls only read dashboard_data/user_context - run them concurrently
+                logger.debug("Running Gemini enhancements concurrently")
+                next_skill = dashboard_data["next_skill"]
+                (
+                    personalized_tips,
+                    enhanced_milestones,
+                    priority_skills,
+                    comprehensive_enhancements,
+                    enhanced_path
+                ) = await asyncio.gather(
+                    gemini_enhancer.generate_personalized_tips(next_skill, user_context) if next_skill else asyncio.sleep(0),
+                    gemini_enhancer.generate_learning_milestones(dashboard_data, user_context),
+                    gemini_enhancer.analyze_skill_gaps_intelligently(current_progress, available_skills),
+                    gemini_enhancer.generate_comprehensive_enhancements(dashboard_data, user_context, current_progress),
+                    gemini_enhancer.enhance_learning_path(dashboard_data, user_context),
+                    return_exceptions=True
+                )
                 
                 # Enhance next skill with personalized tips
-                if dashboard_data["next_skill"]:
-                    print("💡 Generating personalized learning tips with LLM...")
-                    personalized_tips = await gemini_enhancer.generate_personalized_tips(
-                        dashboard_data["next_skill"], 
-                        user_context
-                    )
-                    dashboard_data["next_skill"]["learning_tips"] = personalized_tips
-                    dashboard_data["next_skill"]["enhanced_by_llm"] = True
+                if next_skill and not isinstance(personalized_tips, Exception):
+                    next_skill["learning_tips"] = personalized_tips
+                    next_skill["enhanced_by_llm"] = True
                 
-                # Generate intelligent milestones
-                print("🎯 Generating intelligent milestones with LLM...")
+                # Intelligent milestones
                 try:
-                    enhanced_milestones = await gemini_enhancer.generate_learning_milestones(
-                        dashboard_data, 
-                        user_context
-                    )
+                    if isinstance(enhanced_milestones, Exception):
+                        raise enhanced_milestones
                     if enhanced_milestones and isinstance(enhanced_milestones, list) and len(enhanced_milestones) > 0:
-                        # Validate milestones before adding
-                        validated_milestones = gemini_enhancer._validate_milestones(enhanced_milestones)
-                        if validated_milestones:
-                            dashboard_data["milestones"] = validated_milestones
-                            dashboard_data["milestones_enhanced_by_llm"] = True
-                            print(f"✅ Successfully generated and validated {len(validated_milestones)} milestones")
-                        else:
-                            print("⚠️ Milestone validation failed, using fallback")
-                            dashboard_data["milestones"] = gemini_enhancer._get_fallback_milestones(dashboard_data)
+                        # Validated once in the final pass below
+                        dashboard_data["milestones"] = enhanced_milestones
+                        dashboard_data["milestones_enhanced_by_llm"] = True
+                        logger.debug("Generated %d milestones", len(enhanced_milestones))
                     else:
-                        print("⚠️ No milestones generated, using fallback")
-                        dashboard_data["milestones"] = gemini_enhancer._get_fallback_milestones(dashboard_data)
+                        logger.warning("No milestones generated, using fallback")
+                        dashboard_data["milestones"] = None  # Filled with the fallback in the final pass
                 except Exception as e:
-                    print(f"⚠️ Error generating milestones: {e}")
-                    dashboard_data["milestones"] = gemini_enhancer._get_fallback_milestones(dashboard_data)
+                    logger.warning("Error generating milestones: %s", e)
+                    dashboard_data["milestones"] = None
                 
-                # Analyze skill gaps intelligently
-                print("🔍 Analyzing skill gaps with LLM...")
-                priority_skills = await gemini_enhancer.analyze_skill_gaps_intelligently(
-                    current_progress, 
-                    available_skills
-                )
-                if priority_skills:
+                # Skill gap analysis
+                if priority_skills and not isinstance(priority_skills, Exception):
                     dashboard_data["llm_priority_skills"] = priority_skills
                 
-                # Generate comprehensive enhancements
-                print("🚀 Generating comprehensive learning enhancements with LLM...")
-                comprehensive_enhancements = await gemini_enhancer.generate_comprehensive_enhancements(
-                    dashboard_data,
-                    user_context,
-                    current_progress
-                )
+                # Failed branches contribute nothing to the merge below
+                if isinstance(comprehensive_enhancements, Exception):
+                    logger.warning("Comprehensive enhancements failed: %s", comprehensive_enhancements)
+                    comprehensive_enhancements = {}
+                if isinstance(enhanced_path, Exception):
+                    logger.warning("Learning path enhancement failed: %s", enhanced_path)
+                    enhanced_path = {}
                 
-                # Merge comprehensive enhancements with consistent structure
-                if comprehensive_enhancements.get("enhanced_recommendations"):
+                # Only build the baseline structure and merge when the LLM returned something
+                if comprehensive_enhancements.get("enhanced_recommendations") or enhanced_path.get("enhanced_recommendations"):
                     # Initialize if not exists
                     if "enhanced_recommendations" not in dashboard_data:
                         dashboard_data["enhanced_recommendations"] = {}
                     
                     # Ensure all required fields exist
-                    required_fields = [
-                        "personalized_strategies", "study_schedule", "real_world_applications",
-                        "progress_tracking", "adaptive_learning", "motivation_insights",
-                        "complementary_resources", "difficulty_progression", "gamification_elements"
-                    ]
-                    
-                    for field in required_fields:
+                    for field, kind in _ENH_FIELD_KIND.items():
                         if field not in dashboard_data["enhanced_recommendations"]:
-                            dashboard_data["enhanced_recommendations"][field] = [] if field.endswith('s') else {}
-                    
-                    # Merge the enhancements
-                    for key, value in comprehensive_enhancements["enhanced_recommendations"].items():
-                        if key in dashboard_data["enhanced_recommendations"]:
-                            if isinstance(value, list) and isinstance(dashboard_data["enhanced_recommendations"][key], list):
-                                # Merge lists, avoiding duplicates
-                                existing_items = {str(item) for item in dashboard_data["enhanced_recommendations"][key]}
-                                for item in value:
-                                    if str(item) not in existing_items:
-                                        dashboard_data["enhanced_recommendations"][key].append(item)
-                            elif isinstance(value, dict) and isinstance(dashboard_data["enhanced_recommendations"][key], dict):
-                                # Merge dictionaries
-                                dashboard_data["enhanced_recommendations"][key].update(value)
-                            else:
-                                # Replace non-list/dict values
-                                dashboard_data["enhanced_recommendations"][key] = value
-                        else:
-                            # Add new field
-                            dashboard_data["enhanced_recommendations"][key] = value
+                            dashboard_data["enhanced_recommendations"][field] = kind()
                     
-                    dashboard_data["enhancements_enhanced_by_llm"] = True
-                
-                # Enhance overall learning path
-                print("🧠 Enhancing overall learning path with LLM...")
-                enhanced_path = await gemini_enhancer.enhance_learning_path(
-                    dashboard_data, 
-                    user_context
-                )
-                
-                # Merge any additional enhanced data with consistent structure
-                if enhanced_path.get("enhanced_recommendations"):
-                    # Ensure consistent structure
-                    if "enhanced_recommendations" not in dashboard_data:
-                        dashboard_data["enhanced_recommendations"] = {}
-                    
-                    # Ensure all required fields exist
-                    required_fields = [
-                        "personalized_strategies", "study_schedule", "real_world_applications",
-                        "progress_tracking", "adaptive_learning", "motivation_insights",
-                        "complementary_resources", "difficulty_progression", "gamification_elements"
-                    ]
-                    
-                    for field in required_fields:
-                        if field not in dashboard_data["enhanced_recommendations"]:
-                            dashboard_data["enhanced_recommendations"][field] = [] if field.endswith('s') else {}
+                    # Dedup keys are built once per list field and shared by both merges
+                    seen_items = {}
+                    if comprehensive_enhancements.get("enhanced_recommendations"):
+                        _merge_enhanced_recommendations(
+                            dashboard_data["enhanced_recommendations"],
+                            comprehensive_enhancements["enhanced_recommendations"],
+                            seen_items
+                        )
+                        dashboard_data["enhancements_enhanced_by_llm"] = True
                     
-                    # Merge with existing enhancements
-                    for key, value in enhanced_path["enhanced_recommendations"].items():
-                        if key in dashboard_data["enhanced_recommendations"]:
-                            if isinstance(value, list) and isinstance(dashboard_data["enhanced_recommendations"][key], list):
-                                # Merge lists, avoiding duplicates
-                                existing_items = {str(item) for item in dashboard_data["enhanced_recommendations"][key]}
-                                for item in value:
-                                    if str(item) not in existing_items:
-                                        dashboard_data["enhanced_recommendations"][key].append(item)
-                            elif isinstance(value, dict) and isinstance(dashboard_data["enhanced_recommendations"][key], dict):
-                                # Merge dictionaries
-                                dashboard_data["enhanced_recommendations"][key].update(value)
-                            else:
-                                # Replace non-list/dict values
-                                dashboard_data["enhanced_recommendations"][key] = value
-                        else:
-                            # Add new field
-                            dashboard_data["enhanced_recommendations"][key] = value
+                    # Merge any additional enhanced path data
+                    if enhanced_path.get("enhanced_recommendations"):
+                        _merge_enhanced_recommendations(
+                            dashboard_data["enhanced_recommendations"],
+                            enhanced_path["enhanced_recommendations"],
+                            seen_items
+                        )
+                else:
+                    # Nothing to merge - reuse the shared read-only template
+                    logger.debug("LLM returned no enhanced recommendations, skipping merge")
+                    dashboard_data["enhanced_recommendations"] = _EMPTY_ENH_TEMPLATE
                 
                 dashboard_data["enhancement_method"] = "llm_enhanced"
                 dashboard_data["llm_enhancement_status"] = "success"
                 
-                # Validate final structure
-                if "enhanced_recommendations" in dashboard_data:
-                    dashboard_data["enhanced_recommendations"] = gemini_enhancer._validate_and_clean_enhancements(
-                        dashboard_data["enhanced_recommendations"]
-                    )
-                
-                if "milestones" in dashboard_data and dashboard_data["milestones"] is not None:
-                    dashboard_data["milestones"] = gemini_enhancer._validate_milestones(
-                        dashboard_data["milestones"]
-                    )
-                elif "milestones" not in dashboard_data or dashboard_data["milestones"] is None:
-                    # Ensure milestones exist with fallback
-                    dashboard_data["milestones"] = gemini_enhancer._get_fallback_milestones(dashboard_data)
-                
-                print("✅ LLM enhancement completed successfully!")
+                logger.debug("LLM enhancement completed")
                 
             except Exception as e:
-                print(f"⚠️ LLM enhancement failed: {e}")
+                logger.exception("LLM enhancement failed, falling back to rule-based data")
                 dashboard_data["enhancement_method"] = "rule_based_fallback"
                 dashboard_data["llm_enhancement_status"] = "failed"
                 dashboard_data["llm_error"] = str(e)
                 # Continue with rule-based data
         
-        # Final validation to ensure consistent structure
+        # Single validation pass for both the rule-based and LLM-enhanced payloads
         if "enhanced_recommendations" in dashboard_data:
-            dashboard_data["enhanced_recommendations"] = gemini_enhancer._validate_and_clean_enhancements(
+            dashboard_data["enhanced_recommendations"] = await asyncio.to_thread(
+                gemini_enhancer._validate_and_clean_enhancements,
                 dashboard_data["enhanced_recommendations"]
             )
         
-        if "milestones" in dashboard_data and dashboard_data["milestones"] is not None:
-            dashboard_data["milestones"] = gemini_enhancer._validate_milestones(
-                dashboard_data["milestones"]
-            )
-        elif "milestones" not in dashboard_data or dashboard_data["milestones"] is None:
-            # Ensure milestones exist with fallback
-            dashboard_data["milestones"] = gemini_enhancer._get_fallback_milestones(dashboard_data)
+        dashboard_data["milestones"] = await _ensure_milestones(dashboard_data.get("milestones"), gemini_enhancer)
         
-        return LearningPathResponse(
-            success=True,
-            message=f"Learning dashboard generated successfully using {dashboard_data['enhancement_method']}",
-            data=dashboard_data
-        )
+        # `data` is an untyped Dict assembled here - skip the response_model validation walk over it,
+        # the model still documents the schema
+        return ORJSONResponse({
+            "success": True,
+            "message": f"Learning dashboard generated successfully using {dashboard_data['enhancement_method']}",
+            "data": dashboard_data
+        })
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error in learning dashboard: {e}")
+        logger.exception("Learning dashboard request failed")
         raise HTTPException(
             status_code=500, 
             detail=f"Failed to generate learning dashboard: {str(e)}"
         ) 
+
+def _ndjson(payload: Dict) -> bytes:
+    return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) + b"\n"
+
+@app.post("/learning-path/dashboard/stream")
+async def stream_learning_dashboard(request: LearningPathRequest):
+    """
+    Same dashboard as /learning-path/dashboard, streamed as NDJSON: the rule-based
+    data first, then one line per Gemini enhancement as soon as it completes
+    """
+    try:
+        from src.services.gemini_learning_enhancer import gemini_enhancer
+        
+        # Built before streaming starts so auth and DB errors still map to status codes
+        dashboard_data, user_context = await _build_base_dashboard(request.jwt_token)
+        dashboard_data["milestones"] = await _ensure_milestones(dashboard_data["milestones"], gemini_enhancer)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Learning dashboard stream failed")
+        raise HTTPException(status_code=500, detail=f"Failed to generate learning dashboard: {str(e)}")
+    
+    current_progress = dashboard_data["user_progress"]["progress_summary"]
+    next_skill = dashboard_data["next_skill"]
+    
+    async def run_stage(stage: str, coro) -> Tuple[str, object]:
+        try:
+            return stage, await coro
+        except Exception as e:
+            return stage, e
+    
+    async def generate():
+        yield _ndjson({"stage": "base", "data": dashboard_data})
+        if not request.llm:
+            yield _ndjson({"stage": "done", "enhancement_method": "rule_based"})
+            return
+        
+        stages = [
+            run_stage("milestones", gemini_enhancer.generate_learning_milestones(dashboard_data, user_context)),
+            run_stage("llm_priority_skills", gemini_enhancer.analyze_skill_gaps_intelligently(current_progress, dashboard_data["available_skills"])),
+            run_stage("comprehensive_enhancements", gemini_enhancer.generate_comprehensive_enhancements(dashboard_data, user_context, current_progress)),
+            run_stage("enhanced_path", gemini_enhancer.enhance_learning_path(dashboard_data, user_context))
+        ]
+        if next_skill:
+            stages.append(run_stage("learning_tips", gemini_enhancer.generate_personalized_tips(next_skill, user_context)))
+        tasks = [asyncio.ensure_future(stage) for stage in stages]
+        
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                stage, result = await next_done
+                if isinstance(result, Exception):
+                    yield _ndjson({"stage": stage, "error": str(result)})
+                    continue
+                if stage == "milestones":
+                    result = await _ensure_milestones(result, gemini_enhancer)
+                elif stage in ("comprehensive_enhancements", "enhanced_path"):
+                    # Both sources emit an enhanced_recommendations line - the client merges them
+                    recommendations = result.get("enhanced_recommendations") if isinstance(result, dict) else None
+                    if not recommendations:
+                        continue
+                    stage, result = "enhanced_recommendations", await asyncio.to_thread(
+                        gemini_enhancer._validate_and_clean_enhancements,
+                        recommendations
+                    )
+                yield _ndjson({"stage": stage, "data": result})
+            yield _ndjson({"stage": "done", "enhancement_method": "llm_enhanced"})
+        finally:
+            # Client disconnected mid-stream - don't leave Gemini calls running
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
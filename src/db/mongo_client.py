@@ -0,0 +1,39 @@
+"""
+Shared MongoDB client - one lazily created connection pool per process
+"""
+import os
+import threading
+from pymongo import MongoClient
+from pymongo.database import Database
+from pymongo.server_api import ServerApi
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MONGO_URI = os.getenv("MONGO_URI")
+DB_NAME = os.getenv("MONGO_DB_NAME", "Users")
+MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "5"))
+
+# IndexOptionsConflict / IndexKeySpecsConflict - an equivalent index already exists under another name or options
+INDEX_CONFLICT_CODES = (85, 86)
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client() -> MongoClient:
+    """Create the client on first use so importing a db module does no network I/O"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MongoClient(
+                    MONGO_URI,
+                    server_api=ServerApi('1'),
+                    maxPoolSize=MAX_POOL_SIZE,
+                    minPoolSize=MIN_POOL_SIZE
+                )
+    return _client
+
+def get_db() -> Database:
+    return get_client()[DB_NAME]
@@ -1,24 +1,57 @@
 import os
 import datetime
-from pymongo import MongoClient
-from pymongo.server_api import ServerApi
+import logging
+from typing import Optional, Tuple
 from dotenv import load_dotenv
+from pymongo.errors import DuplicateKeyError, OperationFailure
 from src.api.auth import hash_password
+from src.db.mongo_client import INDEX_CONFLICT_CODES, get_client, get_db
 
 load_dotenv()
 
-MONGO_URI = os.getenv("MONGO_URI")
-DB_NAME = os.getenv("MONGO_DB_NAME", "Users")
+logger = logging.getLogger(__name__)
+
 USER_COLLECTION_NAME = os.getenv("MONGO_USER_COLLECTION", "user")
 
-client = MongoClient(MONGO_URI, server_api=ServerApi('1'))
-db = client[DB_NAME]
-user_collection = db[USER_COLLECTION_NAME]
+_indexes_ensured = False
+
+def ensure_user_indexes():
+    # Signup relies on this to reject duplicate emails in a single round trip, so failure is fatal
+    try:
+        get_db()[USER_COLLECTION_NAME].create_index("email", unique=True, name="email_unique")
+    except OperationFailure as e:
+        if e.code in INDEX_CONFLICT_CODES:
+            logger.warning("Email index on %s already exists with a different name or options: %s", USER_COLLECTION_NAME, e)
+            return
+        logger.exception("Could not ensure the unique email index on %s - existing duplicate emails?", USER_COLLECTION_NAME)
+        raise
+    except Exception:
+        logger.exception("Could not ensure the unique email index on %s", USER_COLLECTION_NAME)
+        raise
+
+def _users():
+    global _indexes_ensured
+    if not _indexes_ensured:
+        # Flag only after success - a failed build is retried on the next call
+        ensure_user_indexes()
+        _indexes_ensured = True
+    return get_db()[USER_COLLECTION_NAME]
+
+def get_users_collection():
+    """The user collection with its unique email index ensured - every user write goes through this"""
+    return _users()
+
+def __getattr__(name):
+    # Keep the old module attributes importable without connecting at import time
+    if name == "client":
+        return get_client()
+    if name == "db":
+        return get_db()
+    if name == "user_collection":
+        return _users()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def create_user(email: str, name: str, password: str):
-    if user_collection.find_one({"email": email}):
-        return None  # User already exists
-    
     user = {
         "email": email,
         "name": name,
@@ -34,16 +67,21 @@ def create_user(email: str, name: str, password: str):
             "topics_covered": [],
             "last_active": None
         },
-        "created_at": datetime.datetime.utcnow()
+        "created_at": datetime.datetime.now(datetime.timezone.utc)
     }
-    user_collection.insert_one(user)
+    try:
+        _users().insert_one(user)
+    except DuplicateKeyError:
+        return None  # User already exists
     return user
 
-def get_user_by_email(email: str):
-    return user_collection.find_one({"email": email})
+def get_user_by_email(email: str, fields: Optional[Tuple[str, ...]] = None):
+    # fields limits the returned document, e.g. to skip the growing progress.sessions list
+    projection = {field: 1 for field in fields} if fields else None
+    return _users().find_one({"email": email}, projection)
 
 def update_user_goal(email: str, topic: str, duration_days: int, daily_target: int = 10):
-    return user_collection.update_one(
+    return _users().update_one(
         {"email": email},
         {
             "$set": {
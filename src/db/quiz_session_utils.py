@@ -1,81 +1,153 @@
-from pymongo import MongoClient
-from pymongo.server_api import ServerApi
-from datetime import datetime, timedelta
+import logging
+from typing import Optional, Tuple
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReturnDocument
+from pymongo.errors import OperationFailure
+from datetime import datetime, timezone
 import os
 from dotenv import load_dotenv
+from src.db.mongo_client import INDEX_CONFLICT_CODES, get_client, get_db
+from src.db.mongo_utils import get_users_collection
 
 load_dotenv()
 
-MONGO_URI = os.getenv("MONGO_URI")
-DB_NAME = os.getenv("MONGO_DB_NAME", "Users")
+logger = logging.getLogger(__name__)
+
 COLLECTION_NAME = os.getenv("MONGO_QUIZ_COLLECTION", "quiz_sessions")
-USER_COLLECTION_NAME = os.getenv("MONGO_USER_COLLECTION", "user")
 
+_indexes_ensured = False
+
+def ensure_quiz_session_indexes():
+    # Every session lookup filters on (email, day); one session per user per day.
+    # (email, created_at) serves per-user "latest sessions" reads without a sort in memory.
+    # The session upsert is only race-free with the unique index, so failure is fatal.
+    # One command per index, so an existing equivalent of one doesn't skip the other
+    collection = get_db()[COLLECTION_NAME]
+    for index in (
+        IndexModel([("email", ASCENDING), ("day", ASCENDING)], unique=True, name="email_day_unique"),
+        IndexModel([("email", ASCENDING), ("created_at", DESCENDING)], name="email_created_at")
+    ):
+        name = index.document["name"]
+        try:
+            collection.create_indexes([index])
+        except OperationFailure as e:
+            if e.code in INDEX_CONFLICT_CODES:
+                logger.warning("%s index %s already exists with a different name or options: %s", COLLECTION_NAME, name, e)
+                continue
+            logger.exception("Could not ensure %s index %s - existing duplicate (email, day) sessions?", COLLECTION_NAME, name)
+            raise
+        except Exception:
+            logger.exception("Could not ensure %s index %s", COLLECTION_NAME, name)
+            raise
+
+def _users():
+    # Shared with mongo_utils so the unique email index also guards the login upsert
+    return get_users_collection()
+
+def _sessions():
+    global _indexes_ensured
+    if not _indexes_ensured:
+        # First use rather than import time - importing this module does no network I/O.
+        # Flag only after success - a failed build is retried on the next call
+        ensure_quiz_session_indexes()
+        _indexes_ensured = True
+    return get_db()[COLLECTION_NAME]
+
+def get_quiz_sessions_collection():
+    """The quiz_sessions collection - call inside functions so importing callers do no network I/O"""
+    return _sessions()
+
+def __getattr__(name):
+    # Keep the old module attributes importable without connecting at import time
+    if name == "client":
+        return get_client()
+    if name == "db":
+        return get_db()
+    if name == "users_collection":
+        return _users()
+    if name == "quiz_sessions_collection":
+        return _sessions()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-client = MongoClient(MONGO_URI, server_api=ServerApi('1'))
-db = client[DB_NAME]
-users_collection = db[USER_COLLECTION_NAME]
-quiz_sessions_collection = db[COLLECTION_NAME]
+_UTC = timezone.utc
 
-def get_today_date():
-    return datetime.utcnow().date()
+def utc_now() -> datetime:
+    return datetime.now(_UTC)
 
-def get_user(email: str):
-    return users_collection.find_one({"email": email})
+def get_today_date(now: Optional[datetime] = None):
+    return (now or utc_now()).date()
+
+def get_user(email: str, fields: Optional[Tuple[str, ...]] = None):
+    # fields limits the returned document, e.g. to skip the growing progress.sessions list
+    projection = {field: 1 for field in fields} if fields else None
+    return _users().find_one({"email": email}, projection)
 
 def create_or_update_user(email: str, name: str, goal_topic: str, duration_days: int):
-    user = get_user(email)
-    if not user:
-        user = {
-            "email": email,
+    # Insert only if missing and return whichever document exists, in one round trip
+    now = utc_now()
+    return _users().find_one_and_update(
+        {"email": email},
+        {"$setOnInsert": {
             "name": name,
             "goal": {
                 "topic": goal_topic,
                 "duration_days": duration_days,
                 "daily_target": 10,
-                "start_date": get_today_date().isoformat()
+                "start_date": now.date().isoformat()
             },
-            "created_at": datetime.utcnow()
-        }
-        users_collection.insert_one(user)
-    return user
+            "created_at": now
+        }},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
 
-def get_user_day(user):
+def get_user_day(user, now: Optional[datetime] = None):
     start_date = datetime.fromisoformat(user["goal"]["start_date"]).date()
-    today = get_today_date()
+    today = get_today_date(now)
     return (today - start_date).days
 
 def quiz_session_exists(email: str, day: int) -> bool:
-    return quiz_sessions_collection.find_one({"email": email, "day": day}) is not None
+    return _sessions().find_one({"email": email, "day": day}) is not None
 
-def create_quiz_session(email: str, day: int, topic: str, num_questions: int):
+def create_quiz_session(email: str, day: int, topic: str, num_questions: int, now: Optional[datetime] = None):
     session = {
         "email": email,
         "day": day,
         "topic": topic,
         "questions_served": [],  # can be filled later with UUIDs or questions
         "completed": False,
-        "created_at": datetime.utcnow()
+        "created_at": now or utc_now()
     }
-    quiz_sessions_collection.insert_one(session)
+    _sessions().insert_one(session)
     return session
 
-def get_or_create_today_session(email: str):
-    user = get_user(email)
+def get_or_create_today_session(email: str, now: Optional[datetime] = None):
+    user = get_user(email, fields=("goal",))  # Day number and topic both come from goal
     if not user:
         raise ValueError("User does not exist")
 
-    day = get_user_day(user)
+    # One clock read per request - the day number and created_at agree even across midnight
+    now = now or utc_now()
+    day = get_user_day(user, now)
     topic = user["goal"]["topic"]
     
-    existing = quiz_sessions_collection.find_one({"email": email, "day": day})
-    if existing:
-        return existing
-
-    return create_quiz_session(email=email, day=day, topic=topic, num_questions=user["goal"].get("daily_target", 10))
+    # The (email, day) unique index makes this upsert race-free
+    return _sessions().find_one_and_update(
+        {"email": email, "day": day},
+        {"$setOnInsert": {
+            "topic": topic,
+            "questions_served": [],
+            "completed": False,
+            "created_at": now
+        }},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
 
-def mark_quiz_completed(email: str, day: int):
-    quiz_sessions_collection.update_one(
+def mark_quiz_completed(email: str, day: int, now: Optional[datetime] = None):
+    # Return the updated session in the same round trip so callers don't re-read it.
+    # $ifNull keeps the first completed_at, so repeat calls are a no-op
+    return _sessions().find_one_and_update(
         {"email": email, "day": day},
-        {"$set": {"completed": True, "completed_at": datetime.utcnow()}}
+        [{"$set": {"completed": True, "completed_at": {"$ifNull": ["$completed_at", now or utc_now()]}}}],
+        return_document=ReturnDocument.AFTER
     )
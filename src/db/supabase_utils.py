@@ -2,12 +2,18 @@
 Supabase utilities for user topic progress
 """
 import os
+import threading
+import time
 from typing import Dict, List, Optional
 from supabase import create_client, Client
 from dotenv import load_dotenv
+from src.api.jwt_utils import get_token_expiry
 
 load_dotenv()
 
+# Authenticated clients are reused per JWT for at most this long (seconds), never past the token's exp
+AUTH_CLIENT_TTL = float(os.getenv("SUPABASE_AUTH_CLIENT_TTL", "300"))
+
 class SupabaseManager:
     def __init__(self):
         self.supabase_url = os.getenv('SUPABASE_URL')
@@ -17,6 +23,8 @@ class SupabaseManager:
             raise ValueError("SUPABASE_URL and SUPABASE_ANON_KEY must be set in environment variables")
         
         self.client: Client = create_client(self.supabase_url, self.supabase_anon_key)
+        self._auth_clients: Dict[str, tuple] = {}  # jwt -> (client, expires_at)
+        self._auth_clients_lock = threading.Lock()
     
     def get_user_topic_progress(self, user_id: str) -> List[Dict]:
         """
@@ -45,7 +53,8 @@ class SupabaseManager:
         Get summary of user progress across all difficulty levels for a topic
         """
         try:
-            response = self.client.table('user_topic_progress').select('*').eq('user_id', user_id).eq('topic', topic).execute()
+            # Only the columns the summary reads - keeps the payload small as progress rows grow
+            response = self.client.table('user_topic_progress').select('difficulty,attempts,correct,accuracy').eq('user_id', user_id).eq('topic', topic).execute()
             progress_data = response.data
             
             if not progress_data:
@@ -58,18 +67,20 @@ class SupabaseManager:
                     "difficulty_breakdown": {}
                 }
             
-            total_attempts = sum(p.get('attempts', 0) for p in progress_data)
-            total_correct = sum(p.get('correct', 0) for p in progress_data)
-            overall_accuracy = (total_correct / total_attempts * 100) if total_attempts > 0 else 0.0
-            
+            # Totals and the per-difficulty breakdown in one pass over the rows
+            total_attempts = total_correct = 0
             difficulty_breakdown = {}
             for p in progress_data:
-                diff = p.get('difficulty', 'unknown')
-                difficulty_breakdown[diff] = {
-                    "attempts": p.get('attempts', 0),
-                    "correct": p.get('correct', 0),
+                attempts = p.get('attempts', 0)
+                correct = p.get('correct', 0)
+                total_attempts += attempts
+                total_correct += correct
+                difficulty_breakdown[p.get('difficulty', 'unknown')] = {
+                    "attempts": attempts,
+                    "correct": correct,
                     "accuracy": p.get('accuracy', 0.0)
                 }
+            overall_accuracy = (total_correct / total_attempts * 100) if total_attempts > 0 else 0.0
             
             return {
                 "user_id": user_id,
@@ -88,15 +99,7 @@ class SupabaseManager:
         Get user topic progress using JWT authentication
         """
         try:
-            # Create a new client with the user's JWT token
-            from supabase import create_client
-            auth_client = create_client(
-                supabase_url=os.getenv('SUPABASE_URL'),
-                supabase_key=os.getenv('SUPABASE_ANON_KEY')
-            )
-            
-            # Set the user's JWT token for authentication
-            auth_client.auth.set_session(jwt_token, None)
+            auth_client = self._get_auth_client(jwt_token)
             
             # Now query with user context
             response = auth_client.table('user_topic_progress').select('*').eq('user_id', user_id).execute()
@@ -104,6 +107,41 @@ class SupabaseManager:
         except Exception as e:
             print(f"Error fetching authenticated user topic progress for {user_id}: {e}")
             return []
+    
+    def _get_auth_client(self, jwt_token: str) -> Client:
+        """
+        Client carrying the user's session, reused until the token expires (at most
+        AUTH_CLIENT_TTL seconds) so repeat requests skip client construction,
+        connection setup and set_session
+        """
+        now = time.monotonic()
+        with self._auth_clients_lock:
+            entry = self._auth_clients.get(jwt_token)
+            if entry and now < entry[1]:
+                return entry[0]
+        
+        # Create a new client with the user's JWT token
+        auth_client = create_client(
+            supabase_url=self.supabase_url,
+            supabase_key=self.supabase_anon_key
+        )
+        
+        # Set the user's JWT token for authentication
+        auth_client.auth.set_session(jwt_token, None)
+        
+        ttl = AUTH_CLIENT_TTL
+        exp = get_token_expiry(jwt_token)
+        if exp is not None:
+            ttl = min(ttl, exp - time.time())
+        
+        with self._auth_clients_lock:
+            # Drop expired sessions so the map stays bounded by active users
+            for token in [t for t, (_, expires_at) in self._auth_clients.items() if expires_at <= now]:
+                del self._auth_clients[token]
+            if ttl > 0:
+                # An already-expired token still gets its client for this call, but it isn't kept
+                self._auth_clients[jwt_token] = (auth_client, now + ttl)
+        return auth_client
 
 # Global instance - will be created when first accessed
 _supabase_manager = None
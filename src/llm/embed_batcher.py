@@ -0,0 +1,92 @@
+"""
+Embed Batcher - coalesces concurrent query embeddings into one encode call
+"""
+import asyncio
+import logging
+import os
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.llm.embedder import embed_queries, embed_query
+
+logger = logging.getLogger(__name__)
+
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+EMBED_BATCH_MAX_WAIT_MS = int(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "10"))
+
+class EmbedBatcher:
+    """
+    asyncio.Queue-backed front for the embedder. A background task collects up to
+    batch_size queries or waits max_wait_ms and encodes them in one forward pass.
+    When nothing else is queued or encoding, a lone query goes straight through
+    so idle workers don't pay the wait.
+    """
+    def __init__(self, batch_size: int = EMBED_BATCH_SIZE, max_wait_ms: int = EMBED_BATCH_MAX_WAIT_MS):
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight: Set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._collect())
+
+    async def stop(self) -> None:
+        if self._worker:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+        await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    async def submit(self, query: str) -> np.ndarray:
+        """Normalized embedding for one query, same vector as embed_query"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((query, future))
+        return await future
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            if self._queue.empty() and not self._in_flight:
+                # Idle system - nothing to coalesce with
+                self._dispatch(batch)
+                continue
+
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        # Encode off the collector so the next window opens immediately
+        task = asyncio.create_task(self._process(batch))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _process(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        try:
+            if len(batch) == 1:
+                # embed_query's memo answers repeats without a forward pass
+                vectors = [await asyncio.to_thread(embed_query, batch[0][0])]
+            else:
+                # Shares embed_query's memo - only unseen queries hit the encoder
+                vectors = await asyncio.to_thread(embed_queries, [query for query, _ in batch])
+        except Exception as e:
+            logger.exception("Embedding batch of %d failed", len(batch))
+            vectors = [e] * len(batch)
+
+        for (_, future), vector in zip(batch, vectors):
+            if future.done():
+                continue  # Caller went away
+            if isinstance(vector, BaseException):
+                future.set_exception(vector)
+            else:
+                future.set_result(vector)
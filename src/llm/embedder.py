@@ -1,19 +1,106 @@
+import os
+import threading
+from collections import OrderedDict
 from sentence_transformers import SentenceTransformer
 from typing import List, Union
+import numpy as np
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+# "onnx" runs the int8-quantized export shipped in the model repo on ONNX Runtime (needs sentence-transformers[onnx])
+EMBEDDER_BACKEND = os.getenv("EMBEDDER_BACKEND", "torch")
+EMBEDDER_ONNX_FILE = os.getenv("EMBEDDER_ONNX_FILE", "onnx/model_quint8_avx2.onnx")
 
 _model = None
+_model_lock = threading.Lock()
+
+# Query embeddings keyed on the normalized text - bulk and ingestion encodes bypass it
+QUERY_CACHE_SIZE = 10_000
+_query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+_query_cache_lock = threading.Lock()
 
 def get_embedder() -> SentenceTransformer:
     global _model
     if _model is None:
-        _model = SentenceTransformer("all-MiniLM-L6-v2")
+        # Warm-up and threadpool callers can race here - load the weights once
+        with _model_lock:
+            if _model is None:
+                if EMBEDDER_BACKEND == "onnx":
+                    model = SentenceTransformer(MODEL_NAME, backend="onnx", model_kwargs={"file_name": EMBEDDER_ONNX_FILE})
+                else:
+                    model = SentenceTransformer(MODEL_NAME)  # Picks CUDA when available
+                model.encode("warm-up", show_progress_bar=False)  # First call initializes kernels
+                _model = model
     return _model
 
 def get_embedding(text: str) -> List[float]:
-    model = get_embedder()
-    return model.encode(text, convert_to_numpy=True).tolist()
+    """Query embedding as a list of floats - shares embed_query's memo"""
+    return embed_query(text).tolist()
+
+def embed_texts(
+    texts: Union[List[str], str],
+    batch_size: int = 64,
+    return_numpy: bool = False
+) -> Union[List[List[float]], np.ndarray]:
+    """
+    Normalized embeddings in batches of batch_size. Uncached - meant for documents
+    and bulk work. return_numpy skips the per-float list conversion for callers
+    that consume the array directly.
+    """
+    embeddings = get_embedder().encode(
+        texts,
+        batch_size=batch_size,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False
+    )
+    return embeddings if return_numpy else embeddings.tolist()
+
+def _normalize_query(query: str) -> str:
+    # all-MiniLM-L6-v2 uses an uncased tokenizer, so this doesn't change the vector
+    return " ".join(query.lower().split())
+
+def _remember(key: str, vector: np.ndarray) -> None:
+    vector.setflags(write=False)  # Shared between callers
+    with _query_cache_lock:
+        _query_cache[key] = vector
+        while len(_query_cache) > QUERY_CACHE_SIZE:
+            _query_cache.popitem(last=False)
 
-def embed_texts(texts: Union[List[str], str]) -> List[List[float]]:
-    model = get_embedder()
-    return model.encode(texts, show_progress_bar=True, convert_to_numpy=True).tolist()
+def embed_query(query: str) -> np.ndarray:
+    """L2-normalized query embedding, memoized on the whitespace/case-normalized text"""
+    key = _normalize_query(query)
+    with _query_cache_lock:
+        vector = _query_cache.get(key)
+        if vector is not None:
+            _query_cache.move_to_end(key)
+            return vector
+    
+    vector = get_embedder().encode(key, convert_to_numpy=True, normalize_embeddings=True).astype(np.float32)
+    _remember(key, vector)
+    return vector
 
+def embed_queries(queries: List[str]) -> np.ndarray:
+    """
+    embed_query for several queries at once - memo hits are reused and the
+    misses are encoded together in one forward pass
+    """
+    keys = [_normalize_query(query) for query in queries]
+    vectors = {}
+    with _query_cache_lock:
+        for key in keys:
+            vector = _query_cache.get(key)
+            if vector is not None:
+                _query_cache.move_to_end(key)
+                vectors[key] = vector
+    
+    misses = list(dict.fromkeys(key for key in keys if key not in vectors))
+    if misses:
+        encoded = embed_texts(misses, return_numpy=True).astype(np.float32)
+        for key, vector in zip(misses, encoded):
+            vector = vector.copy()  # Own buffer, so the batch array isn't pinned by one entry
+            _remember(key, vector)
+            vectors[key] = vector
+    
+    if not keys:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.vstack([vectors[key] for key in keys])
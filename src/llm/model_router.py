@@ -2,8 +2,6 @@ import os
 import logging
 from typing import Literal
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_community.llms import HuggingFaceHub
-import openai
 
 logging.basicConfig(level=logging.INFO)
 
@@ -28,6 +26,9 @@ def route_llm(model_type: ModelType = "gemini", model_name: str = None):
         if not hf_token:
             raise EnvironmentError("HUGGINGFACEHUB_API_TOKEN not found in environment variables.")
 
+        # Only load langchain_community when the HF route is actually used
+        from langchain_community.llms import HuggingFaceHub
+
         return HuggingFaceHub(
             repo_id=model_name or "mistralai/Mistral-7B-Instruct-v0.1",
             model_kwargs={"temperature": 0.2, "max_new_tokens": 512}
@@ -3,7 +3,6 @@ Learning Path API Models
 """
 from typing import List, Dict, Optional
 from pydantic import BaseModel, Field
-from src.services.learning_path_optimizer import LearningPath
 
 class LearningPathRequest(BaseModel):
     """Request model for learning path optimization - with LLM option"""
@@ -1,8 +1,18 @@
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
+from functools import lru_cache
 from typing import TypedDict, List, Optional
-from src.vector_store.qdrant_utils import search_similar_questions
-from src.llm.embedder import embed_texts
+import numpy as np
+from src.vector_store.qdrant_utils import (
+    on_collection_updated, search_similar_questions, search_similar_questions_async, search_similar_questions_batch
+)
+from src.llm.embedder import embed_queries, embed_query
 from src.llm.model_router import route_llm
+from src.services.semantic_cache import retrieval_cache
+
+# Cache namespace for the graph's top-5 retrieval
+_HITS_NAMESPACE = "hits:top5"
+on_collection_updated(retrieval_cache.invalidate)
 
 
 # Step 1: Define state structure
@@ -14,21 +24,50 @@ class RAGState(TypedDict, total=False):
     model_type: str  # e.g., "gemini", "hf", etc.
     model_name: str  # Optional override for model selection
     use_llm: bool = False  # Whether to use LLM for explanation
+    cache_hit: bool  # Retrieval served from the cache, Qdrant skipped
 
 
 # Step 2: Embed query
 def embed_query_node(state: RAGState) -> RAGState:
-    embedding = embed_texts([state["query"]])[0]
-    return {**state, "embedding": embedding}
+    # Nodes return only the keys they change - LangGraph merges them into the state
+    if state.get("embedding") is not None:
+        return {}  # Caller already embedded the query
+    return {"embedding": embed_query(state["query"]).tolist()}
+
+
+# Step 3: Reuse cached hits for near-duplicate queries - a hit skips the Qdrant node entirely
+def cache_lookup_node(state: RAGState) -> RAGState:
+    hits = retrieval_cache.lookup(_HITS_NAMESPACE, np.asarray(state["embedding"], dtype=np.float32))
+    if hits is None:
+        return {"cache_hit": False}
+    return {**_hits_update(hits), "cache_hit": True}
+
 
+def _route_after_cache(state: RAGState) -> str:
+    return "generate_response" if state.get("cache_hit") else "search_qdrant"
 
-# Step 3: Search Qdrant
+
+# Step 4: Search Qdrant
 def search_qdrant_node(state: RAGState) -> RAGState:
-    hits = search_similar_questions(state["query"], top_k=5)
+    embedding = state.get("embedding")
+    hits = search_similar_questions(state["query"], top_k=5, query_embedding=embedding)
+    if embedding is not None:
+        retrieval_cache.store(_HITS_NAMESPACE, np.asarray(embedding, dtype=np.float32), hits)
+    return _hits_update(hits)
+
+
+async def asearch_qdrant_node(state: RAGState) -> RAGState:
+    """Async twin of search_qdrant_node - awaits Qdrant on the shared async client"""
+    embedding = state.get("embedding")
+    hits = await search_similar_questions_async(state["query"], top_k=5, query_embedding=embedding)
+    if embedding is not None:
+        retrieval_cache.store(_HITS_NAMESPACE, np.asarray(embedding, dtype=np.float32), hits)
+    return _hits_update(hits)
+
 
+def _hits_update(hits: List[dict]) -> RAGState:
     if not hits:
         return {
-            **state,
             "context": [],
             "response": {
                 "text": "Sorry, I couldn't find relevant content to answer this question.",
@@ -36,54 +75,117 @@ def search_qdrant_node(state: RAGState) -> RAGState:
                 "metadata": {}
             }
         }
-    return {**state, "context": hits}
+    return {"context": hits}
 
 
-# Step 4: Generate answer with LLM
-def generate_response_node(state: RAGState) -> RAGState:
-    if not state.get("context"):
-        return state  # Can't generate anything without context
+# Step 5: Generate answer with LLM
+def _explanation_prompt(state: RAGState) -> str:
+    context_text = "\n".join([f"- {hit['question']}" for hit in state["context"]])
+    return f"""You are a tutor. Based on the following context questions, generate a summary explanation or thematic insight for the user:
+{context_text}
+"""
 
-    response_payload = {
+
+def _response_payload(state: RAGState) -> dict:
+    return {
         "questions": state["context"],
         "model": None,
         "metadata": {}
     }
+
+
+def _attach_explanation(response_payload: dict, model_type: str, answer_msg) -> None:
+    response_payload["model"] = model_type
+    response_payload["metadata"] = getattr(answer_msg, "response_metadata", {})
+    response_payload["explanation"] = answer_msg.content
+
+
+def generate_response_node(state: RAGState) -> RAGState:
+    if not state.get("context"):
+        return {}  # Can't generate anything without context
+
+    response_payload = _response_payload(state)
     if state.get("use_llm"):
-        context_text = "\n".join([f"- {hit['question']}" for hit in state["context"]])
-        prompt = f"""You are a tutor. Based on the following context questions, generate a summary explanation or thematic insight for the user:
-{context_text}
-"""
         model_type = state.get("model_type", "gemini")
-        model_name = state.get("model_name")
-        llm = route_llm(model_type=model_type, model_name=model_name)
+        llm = route_llm(model_type=model_type, model_name=state.get("model_name"))
         if not llm:
             print("⚠️ LLM could not be initialized. Skipping explanation.")
         else:
-            answer_msg = llm.invoke(prompt)
-            response_payload["model"] = model_type
-            response_payload["metadata"] = getattr(answer_msg, "response_metadata", {})
-            response_payload["explanation"] = answer_msg.content
-    return {**state, "response": response_payload}
+            _attach_explanation(response_payload, model_type, llm.invoke(_explanation_prompt(state)))
+    return {"response": response_payload}
 
 
+async def agenerate_response_node(state: RAGState) -> RAGState:
+    """Async twin of generate_response_node - awaits the LLM instead of holding a worker thread"""
+    if not state.get("context"):
+        return {}
 
-# Step 5: Build the LangGraph
+    response_payload = _response_payload(state)
+    if state.get("use_llm"):
+        model_type = state.get("model_type", "gemini")
+        llm = route_llm(model_type=model_type, model_name=state.get("model_name"))
+        if not llm:
+            print("⚠️ LLM could not be initialized. Skipping explanation.")
+        else:
+            _attach_explanation(response_payload, model_type, await llm.ainvoke(_explanation_prompt(state)))
+    return {"response": response_payload}
+
+
+
+# Batched variant of embed_query -> search_qdrant for concurrent requests
+def batch_retrieve(states: List[RAGState]) -> List[RAGState]:
+    """
+    Embed every query that has no embedding yet in one encode call and
+    search Qdrant for the ones not in the retrieval cache in one round trip
+    """
+    states = [dict(state) for state in states]
+    pending = [state for state in states if state.get("embedding") is None]
+    if pending:
+        for state, embedding in zip(pending, embed_queries([state["query"] for state in pending]).tolist()):
+            state["embedding"] = embedding
+
+    vectors = [np.asarray(state["embedding"], dtype=np.float32) for state in states]
+    hits_per_query = [retrieval_cache.lookup(_HITS_NAMESPACE, vector) for vector in vectors]
+    misses = [i for i, hits in enumerate(hits_per_query) if hits is None]
+    if misses:
+        fetched = search_similar_questions_batch([states[i]["embedding"] for i in misses], top_k=5)
+        for i, hits in zip(misses, fetched):
+            hits_per_query[i] = hits
+            retrieval_cache.store(_HITS_NAMESPACE, vectors[i], hits)
+    for state, hits in zip(states, hits_per_query):
+        state.update(_hits_update(hits))
+    return states
+
+
+# Step 6: Build the LangGraph
 def build_rag_graph():
     builder = StateGraph(RAGState)
 
     builder.add_node("embed_query", embed_query_node)
-    builder.add_node("search_qdrant", search_qdrant_node)
-    builder.add_node("generate_response", generate_response_node)
+    builder.add_node("cache_lookup", cache_lookup_node)
+    # invoke() runs the sync nodes, ainvoke() awaits Qdrant and the LLM call
+    builder.add_node("search_qdrant", RunnableLambda(search_qdrant_node, afunc=asearch_qdrant_node))
+    builder.add_node("generate_response", RunnableLambda(generate_response_node, afunc=agenerate_response_node))
 
     builder.set_entry_point("embed_query")
-    builder.add_edge("embed_query", "search_qdrant")
+    builder.add_edge("embed_query", "cache_lookup")
+    builder.add_conditional_edges(
+        "cache_lookup",
+        _route_after_cache,
+        {"generate_response": "generate_response", "search_qdrant": "search_qdrant"}
+    )
     builder.add_edge("search_qdrant", "generate_response")
     builder.add_edge("generate_response", END)
 
     return builder.compile()
 
 
+@lru_cache(maxsize=1)
+def get_rag_graph():
+    """Process-wide compiled graph - compiled on first use, shared by every caller after"""
+    return build_rag_graph()
+
+
 if __name__ == "__main__":
     graph = build_rag_graph()
     inputs = {
@@ -1,14 +1,73 @@
 """
 Adaptive Quiz Service - Handles user progress analysis and question recommendation
 """
-from typing import List, Dict, Optional
+import os
+import threading
+import time
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
 from fastapi import HTTPException
 from src.db.supabase_utils import get_user_topic_progress
 from src.services.learning_path_optimizer import learning_path_optimizer
+from src.vector_store.qdrant_utils import on_collection_updated, qdrant_client
+from qdrant_client.models import FieldCondition, Filter, MatchAny, MatchValue
+
+# Topics only change when new questions are indexed
+TOPICS_CACHE_TTL = int(os.getenv("TOPICS_CACHE_TTL", "600"))  # seconds
+# Most distinct topics one facet call returns - same cap as the scroll fallback
+TOPIC_FACET_LIMIT = int(os.getenv("TOPIC_FACET_LIMIT", "1000"))
+
+# Payload keys for answer options A-D, in display order
+OPTION_KEYS = ("option_a", "option_b", "option_c", "option_d")
+
+# Difficulties each progress strategy draws from. "exploration" covers the user's topics
+# at these and adds the rotating new topics at Easy
+STRATEGY_DIFFICULTIES = {
+    "cold_start": ("Easy",),
+    "remedial": ("Easy",),
+    "exploration": ("Easy", "Hard"),
+    "advanced": ("Hard", "Medium"),
+    "balanced": ("Easy", "Medium", "Hard")
+}
+
+def _topic_difficulty_clause(topics: Tuple[str, ...], difficulties: Tuple[str, ...]) -> Filter:
+    """Any of topics at any of difficulties - no topics means no topic restriction"""
+    conditions = [FieldCondition(key="difficulty", match=MatchAny(any=list(difficulties)))]
+    if topics:
+        conditions.insert(0, FieldCondition(key="topic", match=MatchAny(any=list(topics))))
+    return Filter(must=conditions)
+
+@lru_cache(maxsize=256)
+def _compile_filter(strategy: str, topics: Tuple[str, ...], new_topics: Tuple[str, ...] = ()) -> Filter:
+    """
+    Strategy filter for a topic set - built once per distinct input and shared, so callers must not mutate it.
+    Topic order doesn't change a MatchAny, so callers pass sorted tuples to share entries.
+    """
+    # Unknown strategies get the balanced mix
+    difficulties = STRATEGY_DIFFICULTIES.get(strategy, STRATEGY_DIFFICULTIES["balanced"])
+    clauses = [_topic_difficulty_clause(topics, difficulties)]
+    if new_topics:
+        clauses.append(_topic_difficulty_clause(new_topics, ("Easy",)))
+    return Filter(should=clauses)
+
+@lru_cache(maxsize=512)
+def _compile_request_filter(requested: Tuple[Tuple[str, str], ...]) -> Filter:
+    """One clause per requested (topic, difficulty) - an empty difficulty matches any. Shared, don't mutate."""
+    clauses = []
+    for topic, difficulty in requested:
+        conditions = [FieldCondition(key="topic", match=MatchValue(value=topic))]
+        if difficulty:
+            conditions.append(FieldCondition(key="difficulty", match=MatchValue(value=difficulty)))
+        clauses.append(Filter(must=conditions))
+    return Filter(should=clauses)
+
+# Easy questions from any topic when nothing narrower applies
+_DEFAULT_FILTER = Filter(must=[FieldCondition(key="difficulty", match=MatchValue(value="Easy"))])
 
 class AdaptiveQuizService:
     def __init__(self):
-        pass
+        self._topics_cache: Optional[Tuple[float, List[str]]] = None
+        self._topics_lock = threading.Lock()
     
     def get_adaptive_quiz_questions(
         self, 
@@ -142,9 +201,18 @@ class AdaptiveQuizService:
         if not user_progress:
             return {"strategy": "balanced", "topics": [], "difficulties": []}
         
-        # Calculate overall performance
-        total_attempts = sum(p.get('attempts', 0) for p in user_progress)
-        total_correct = sum(p.get('correct', 0) for p in user_progress)
+        # Overall totals and the topic/difficulty grouping in one pass over the rows
+        total_attempts = total_correct = 0
+        topic_performance = {}
+        for progress in user_progress:
+            total_attempts += progress.get('attempts', 0)
+            total_correct += progress.get('correct', 0)
+            
+            topic = progress.get('topic', 'Unknown')
+            topic_data = topic_performance.get(topic)
+            if topic_data is None:
+                topic_data = topic_performance[topic] = {'easy': 0, 'medium': 0, 'hard': 0, 'total_accuracy': 0}
+            topic_data[progress.get('difficulty', 'medium')] = progress.get('accuracy', 0)
         overall_accuracy = (total_correct / total_attempts * 100) if total_attempts > 0 else 0
         
         print(f"📊 Progress Analysis:")
@@ -152,27 +220,8 @@ class AdaptiveQuizService:
         print(f"   Total correct: {total_correct}")
         print(f"   Overall accuracy: {overall_accuracy}%")
         
-        # Group by topic and difficulty
-        topic_performance = {}
-        for progress in user_progress:
-            topic = progress.get('topic', 'Unknown')
-            difficulty = progress.get('difficulty', 'medium')
-            accuracy = progress.get('accuracy', 0)
-            
-            if topic not in topic_performance:
-                topic_performance[topic] = {'easy': 0, 'medium': 0, 'hard': 0, 'total_accuracy': 0}
-            
-            topic_performance[topic][difficulty] = accuracy
-        
-        # Calculate total accuracy for each topic properly
-        for topic in topic_performance:
-            topic_data = topic_performance[topic]
-            difficulties_with_attempts = [acc for acc in [topic_data['easy'], topic_data['medium'], topic_data['hard']] if acc > 0]
-            
-            if difficulties_with_attempts:
-                topic_data['total_accuracy'] = sum(difficulties_with_attempts) / len(difficulties_with_attempts)
-            else:
-                topic_data['total_accuracy'] = 0
+        # Per-topic accuracy and every strategy signal in one pass
+        signals = self._summarize_topic_performance(topic_performance)
         
         # Determine strategy with smart progression logic
         if overall_accuracy < 50:
@@ -180,10 +229,7 @@ class AdaptiveQuizService:
             print(f"🎯 Low accuracy ({overall_accuracy}%) - using remedial strategy")
         elif overall_accuracy < 75:
             # Check if user is stuck in easy questions or has gaps
-            easy_heavy = self._is_user_easy_heavy(topic_performance)
-            has_gaps = self._has_significant_gaps(topic_performance)
-            
-            if easy_heavy and has_gaps:
+            if signals["easy_heavy"] and signals["has_gaps"]:
                 strategy = "exploration"  # Help user progress to harder difficulties
                 print(f"🎯 Balanced accuracy ({overall_accuracy}%) but easy-heavy with gaps - using exploration strategy")
             else:
@@ -191,16 +237,7 @@ class AdaptiveQuizService:
                 print(f"🎯 Balanced accuracy ({overall_accuracy}%) - using balanced strategy")
         else:
             # Advanced users need variety - check if they're missing difficulties
-            missing_difficulties = []
-            for topic in topic_performance:
-                topic_data = topic_performance[topic]
-                if topic_data['easy'] == 0:
-                    missing_difficulties.append('easy')
-                if topic_data['medium'] == 0:
-                    missing_difficulties.append('medium')
-                if topic_data['hard'] == 0:
-                    missing_difficulties.append('hard')
-            
+            missing_difficulties = signals["missing_difficulties"]
             if missing_difficulties:
                 strategy = "exploration"  # New strategy for variety
                 print(f"🎯 High accuracy ({overall_accuracy}%) but missing difficulties: {missing_difficulties} - using exploration strategy")
@@ -220,59 +257,47 @@ class AdaptiveQuizService:
             "difficulties": ["easy", "medium", "hard"]
         }
     
-    def _is_user_easy_heavy(self, topic_performance: Dict) -> bool:
+    def _summarize_topic_performance(self, topic_performance: Dict) -> Dict:
         """
-        Check if user is mostly attempting easy questions
+        Fill in each topic's total_accuracy and collect the strategy signals in a single pass:
+        easy_heavy - more than 60% of attempted (topic, difficulty) pairs are easy
+        has_gaps - over 25% of topics unattempted, or medium/hard missing in most topics
+        missing_difficulties - one entry per topic and difficulty with no attempts
         """
-        total_easy_attempts = 0
-        total_medium_attempts = 0
-        total_hard_attempts = 0
-        
-        for topic_data in topic_performance.values():
-            # Count attempts based on accuracy > 0 (indicating attempts were made)
-            if topic_data['easy'] > 0:
-                total_easy_attempts += 1
-            if topic_data['medium'] > 0:
-                total_medium_attempts += 1
-            if topic_data['hard'] > 0:
-                total_hard_attempts += 1
-        
-        # User is easy-heavy if they have significantly more easy attempts than medium/hard
-        total_attempts = total_easy_attempts + total_medium_attempts + total_hard_attempts
-        if total_attempts == 0:
-            return False
-            
-        easy_ratio = total_easy_attempts / total_attempts
-        return easy_ratio > 0.6  # More than 60% of attempts are easy
-    
-    def _has_significant_gaps(self, topic_performance: Dict) -> bool:
-        """
-        Check if user has significant gaps in difficulty levels or topics
-        """
-        # Check for topics with 0% performance (no attempts)
+        coverage = {'easy': 0, 'medium': 0, 'hard': 0}
         topics_with_no_attempts = 0
-        total_topics = len(topic_performance)
+        missing_difficulties = []
         
         for topic_data in topic_performance.values():
+            accuracy_sum = 0
+            attempted = 0
+            for difficulty in ('easy', 'medium', 'hard'):
+                accuracy = topic_data[difficulty]
+                # Accuracy > 0 means attempts were made
+                if accuracy > 0:
+                    coverage[difficulty] += 1
+                    accuracy_sum += accuracy
+                    attempted += 1
+                elif accuracy == 0:
+                    missing_difficulties.append(difficulty)
+            topic_data['total_accuracy'] = accuracy_sum / attempted if attempted else 0
             if topic_data['total_accuracy'] == 0:
                 topics_with_no_attempts += 1
         
-        # Check for difficulty gaps
-        difficulty_coverage = {'easy': 0, 'medium': 0, 'hard': 0}
-        for topic_data in topic_performance.values():
-            for difficulty in ['easy', 'medium', 'hard']:
-                if topic_data[difficulty] > 0:
-                    difficulty_coverage[difficulty] += 1
+        total_topics = len(topic_performance)
+        attempted_pairs = coverage['easy'] + coverage['medium'] + coverage['hard']
+        easy_heavy = attempted_pairs > 0 and coverage['easy'] / attempted_pairs > 0.6
         
-        # User has gaps if:
-        # 1. More than 25% of topics have no attempts, OR
-        # 2. They haven't attempted medium or hard difficulties in most topics
         topic_gap_ratio = topics_with_no_attempts / total_topics if total_topics > 0 else 0
-        has_difficulty_gaps = difficulty_coverage['medium'] < total_topics * 0.5 or difficulty_coverage['hard'] < total_topics * 0.3
+        has_difficulty_gaps = coverage['medium'] < total_topics * 0.5 or coverage['hard'] < total_topics * 0.3
         
-        return topic_gap_ratio > 0.25 or has_difficulty_gaps
+        return {
+            "easy_heavy": easy_heavy,
+            "has_gaps": topic_gap_ratio > 0.25 or has_difficulty_gaps,
+            "missing_difficulties": missing_difficulties
+        }
     
-    def build_adaptive_filter(self, progress_analysis: Dict, topic_requests: List = None) -> Dict:
+    def build_adaptive_filter(self, progress_analysis: Dict, topic_requests: List = None) -> Filter:
         """
         Build vector DB query filter based on user progress analysis
         Handles both Pydantic TopicRequest objects and dictionaries
@@ -289,11 +314,13 @@ class AdaptiveQuizService:
         # No specific topic requests - use system's adaptive logic based on user progress
         print("🎯 No topic requests - using adaptive system logic")
         
+        # Fetched once - every strategy below reads the same list
+        all_available_topics = self.get_all_available_topics()
+        
         # Get topics from user's progress or available topics
         if progress_analysis.get("topics"):
             # Use user's existing topics but also add variety from other available topics
             user_topics = progress_analysis.get("topics", [])
-            all_available_topics = self.get_all_available_topics()
             
             # Mix user's topics with other available topics for variety
             other_topics = [t for t in all_available_topics if t not in user_topics]
@@ -302,49 +329,19 @@ class AdaptiveQuizService:
             topics = user_topics + additional_topics
         else:
             # No user progress, get all available topics
-            topics = self.get_all_available_topics()
+            topics = all_available_topics
         
         # Ensure we have topics to work with
         if not topics:
             print("⚠️ No topics available - this should not happen")
             topics = ["Current Affairs"]  # Minimal fallback only if everything fails
         
-        # Build filter based on strategy
-        if strategy == "cold_start":
-            # Cold start: easy questions across all available topics
-            print("🎯 Cold start strategy: Easy questions across all topics")
-            all_topics = self.get_all_available_topics()
-            filter_config = {
-                "should": [
-                    {
-                        "must": [
-                            {"key": "topic", "match": {"value": topic}},
-                            {"key": "difficulty", "match": {"value": "Easy"}}
-                        ]
-                    } for topic in all_topics
-                ]
-            }
-        elif strategy == "remedial":
-            # Focus on easy questions for struggling users
-            filter_config = {
-                "should": [
-                    {
-                        "must": [
-                            {"key": "topic", "match": {"value": topic}},
-                            {"key": "difficulty", "match": {"value": "Easy"}}
-                        ]
-                    } for topic in topics
-                ]
-            }
-        elif strategy == "exploration":
+        # Build filter based on strategy - one topic x difficulty clause instead of a clause per pair
+        if strategy == "exploration":
             # Exploration strategy: focus on missing difficulties and new topics
             # Add topic rotation for more variety
-            import time
             current_hour = int(time.time() / 3600) % 24  # Hour of day for rotation
             
-            # Get all available topics dynamically
-            all_available_topics = self.get_all_available_topics()
-            
             # Create dynamic topic combinations (avoid hardcoded topics)
             if len(all_available_topics) >= 2:
                 # Create rotating pairs from available topics
@@ -363,76 +360,25 @@ class AdaptiveQuizService:
                 selected_new_topics = all_available_topics[:2] if all_available_topics else []
                 print(f"⚠️ Limited topics available: {selected_new_topics}")
             
-            filter_config = {
-                "should": [
-                    # First priority: missing difficulties in existing topics
-                    {
-                        "must": [
-                            {"key": "topic", "match": {"value": topic}},
-                            {"key": "difficulty", "match": {"value": "Easy"}}
-                        ]
-                    } for topic in topics
-                ] + [
-                    {
-                        "must": [
-                            {"key": "topic", "match": {"value": topic}},
-                            {"key": "difficulty", "match": {"value": "Hard"}}
-                        ]
-                    } for topic in topics
-                ] + [
-                    # Second priority: rotating new topics with easy difficulty
-                    {
-                        "must": [
-                            {"key": "topic", "match": {"value": topic}},
-                            {"key": "difficulty", "match": {"value": "Easy"}}
-                        ]
-                    } for topic in selected_new_topics
-                ]
-            }
-        elif strategy == "advanced":
-            # True advanced: all difficulties attempted, focus on challenging questions
-            filter_config = {
-                "should": [
-                    {
-                        "must": [
-                            {"key": "topic", "match": {"value": topic}},
-                            {"key": "difficulty", "match": {"value": "Hard"}}
-                        ]
-                    } for topic in topics
-                ] + [
-                    {
-                        "must": [
-                            {"key": "topic", "match": {"value": topic}},
-                            {"key": "difficulty", "match": {"value": "Medium"}}
-                        ]
-                    } for topic in topics
-                ]
-            }
+            # Missing difficulties in existing topics first, then rotating new topics at Easy
+            filter_config = _compile_filter(strategy, tuple(sorted(topics)), tuple(sorted(selected_new_topics)))
         else:
-            # Balanced approach - mix of difficulties
-            difficulties = ["Easy", "Medium", "Hard"]
-            filter_config = {
-                "should": [
-                    {
-                        "must": [
-                            {"key": "topic", "match": {"value": topic}},
-                            {"key": "difficulty", "match": {"value": difficulty}}
-                        ]
-                    } for topic in topics for difficulty in difficulties
-                ]
-            }
+            if strategy == "cold_start":
+                # Cold start: easy questions across all available topics
+                print("🎯 Cold start strategy: Easy questions across all topics")
+                topics = all_available_topics
+            filter_config = _compile_filter(strategy, tuple(sorted(topics)))
         
         return filter_config
     
-    def _build_topic_specific_filter(self, topic_requests: List) -> Dict:
+    def _build_topic_specific_filter(self, topic_requests: List) -> Filter:
         """
         Build filter based on specific topic and difficulty requests from user
         Handles both Pydantic TopicRequest objects and dictionaries
         """
         print(f"🎯 Building topic-specific filter for {len(topic_requests)} requests")
         
-        filter_conditions = []
-        
+        requested = set()
         for topic_req in topic_requests:
             # Handle both Pydantic objects and dictionaries
             if hasattr(topic_req, 'topic'):
@@ -444,64 +390,66 @@ class AdaptiveQuizService:
                 topic = topic_req.get("topic")
                 difficulty = topic_req.get("difficulty")
             
-            if not topic:
-                continue
-                
-            if difficulty:
-                # User specified both topic and difficulty
-                print(f"🎯 Adding filter for topic: {topic}, difficulty: {difficulty}")
-                filter_conditions.append({
-                    "must": [
-                        {"key": "topic", "match": {"value": topic}},
-                        {"key": "difficulty", "match": {"value": difficulty}}
-                    ]
-                })
-            else:
-                # User only specified topic, system will choose difficulty
-                print(f"🎯 Adding filter for topic: {topic} (any difficulty)")
-                filter_conditions.append({
-                    "must": [
-                        {"key": "topic", "match": {"value": topic}}
-                    ]
-                })
+            if topic:
+                # No difficulty means the system chooses - any difficulty matches
+                requested.add((topic, difficulty or ""))
         
-        if not filter_conditions:
+        if not requested:
             print("⚠️ No valid topic requests found, falling back to default")
             return self._build_default_filter()
         
-        print(f"🎯 Built {len(filter_conditions)} filter conditions")
-        return {
-            "should": filter_conditions
-        }
+        # Sorted so the same selection in any order shares one cached filter
+        return _compile_request_filter(tuple(sorted(requested)))
     
-    def _build_default_filter(self) -> Dict:
+    def _build_default_filter(self) -> Filter:
         """
         Build a default filter when no specific preferences are given
         """
         print("🎯 Building default filter")
-        return {
-            "should": [
-                {
-                    "must": [
-                        {"key": "difficulty", "match": {"value": "Easy"}}
-                    ]
-                }
-            ]
-        }
+        return _DEFAULT_FILTER
     
     def get_all_available_topics(self) -> List[str]:
         """
-        Dynamically fetch all available topics from the vector database
+        Dynamically fetch all available topics from the vector database.
+        Results are cached for TOPICS_CACHE_TTL seconds; callers share the list, so treat it as read-only.
         """
+        if self.topics_cache_fresh():
+            return self._topics_cache[1]
+        
+        # One fetch per refresh - concurrent callers (e.g. the endpoint's cold-cache prefetch) wait for it
+        with self._topics_lock:
+            if self.topics_cache_fresh():
+                return self._topics_cache[1]
+            return self._fetch_available_topics()
+    
+    def topics_cache_fresh(self) -> bool:
+        """Whether get_all_available_topics would answer from the cache"""
+        cached = self._topics_cache
+        return bool(cached and cached[0] > time.monotonic())
+    
+    def _fetch_available_topics(self) -> List[str]:
+        try:
+            # Distinct values straight from the topic payload index - no points transferred
+            response = qdrant_client.facet(collection_name="gktoday_questions", key="topic", limit=TOPIC_FACET_LIMIT)
+            if len(response.hits) >= TOPIC_FACET_LIMIT:
+                print(f"⚠️ Topic facet hit its limit of {TOPIC_FACET_LIMIT} - some topics may be missing, raise TOPIC_FACET_LIMIT")
+            topic_list = sorted(hit.value for hit in response.hits if hit.value)
+            if topic_list:
+                print(f"🎯 Found {len(topic_list)} available topics: {topic_list}")
+                self._topics_cache = (time.monotonic() + TOPICS_CACHE_TTL, topic_list)
+                return topic_list
+        except Exception as e:
+            # Older servers and local mode without facet support fall back to the scroll
+            print(f"⚠️ Topic facet unavailable, scrolling instead: {e}")
+        
         try:
-            from src.vector_store.qdrant_utils import qdrant_client
-            
             # Get a sample of questions to extract unique topics
             response = qdrant_client.scroll(
                 collection_name="gktoday_questions",
                 scroll_filter={},  # No filter to get all
                 limit=1000,  # Get more to ensure we cover all topics
-                with_payload=True
+                with_payload=["topic"],  # Only the field we read - not 1000 full question payloads
+                with_vectors=False
             )
             
             if not response or not response[0]:
@@ -523,6 +471,7 @@ class AdaptiveQuizService:
             topic_list = sorted(list(topics))
             print(f"🎯 Found {len(topic_list)} available topics: {topic_list}")
             
+            self._topics_cache = (time.monotonic() + TOPICS_CACHE_TTL, topic_list)
             return topic_list
             
         except Exception as e:
@@ -530,31 +479,31 @@ class AdaptiveQuizService:
             # Fallback to empty list - let the system handle it gracefully
             return []
     
-    def fetch_questions_from_vector_db(self, filter_config: Dict, limit: int, user_id: str = None) -> List[Dict]:
+    def invalidate_topics_cache(self) -> None:
+        """Drop the cached topic list, e.g. after indexing new questions"""
+        self._topics_cache = None
+    
+    def fetch_questions_from_vector_db(self, filter_config: Filter, limit: int, user_id: str = None) -> List[Dict]:
         """
         Fetch questions from Qdrant vector database using the adaptive filter
         """
         try:
-            from src.vector_store.qdrant_utils import qdrant_client
             import random
             
-            # Convert our filter to Qdrant format
-            qdrant_filter = self.convert_filter_to_qdrant(filter_config)
-            
             # Fetch more questions than needed to allow for deduplication
             fetch_limit = min(limit * 3, 100)  # Fetch up to 3x more, max 100
             
             # Fetch questions from Qdrant with offset for variety
             # Use timestamp-based offset to get different questions each time
-            import time
             offset = int(time.time() * 1000) % 10000  # Use milliseconds timestamp as offset
             
             response = qdrant_client.scroll(
                 collection_name="gktoday_questions",
-                scroll_filter=qdrant_filter,
+                scroll_filter=filter_config,  # Already a qdrant Filter model
                 limit=fetch_limit,
                 offset=offset,  # Add offset for variety
-                with_payload=True
+                with_payload=True,
+                with_vectors=False
             )
             
             questions = response[0] if response else []
@@ -601,47 +550,34 @@ class AdaptiveQuizService:
         print(f"🔄 Deduplication: {len(questions)} → {len(unique_questions)} unique questions")
         return unique_questions
     
-    def convert_filter_to_qdrant(self, filter_config: Dict) -> Dict:
-        """
-        Convert our filter format to Qdrant's filter format
-        """
-        # This is a simplified conversion - you may need to adjust based on your Qdrant setup
-        return filter_config
-    
     def format_questions_for_quiz(self, questions: List[Dict]) -> List[Dict]:
         """
         Format vector DB questions for quiz response
         """
-        formatted_questions = []
+        if not questions:
+            return []
         
-        for q in questions:
-            # Handle Qdrant Record objects - they have .payload attribute
-            if hasattr(q, 'payload'):
-                payload = q.payload
-                question_id = q.id
-            else:
-                # Fallback for dictionary format
-                payload = q.get('payload', {})
-                question_id = q.get('id', '')
-            
-            # Extract options (assuming they're stored as option_a, option_b, etc.)
-            options = []
-            for i in range(4):  # A, B, C, D
-                option_key = f"option_{chr(97 + i)}"  # a, b, c, d
-                if option_key in payload:
-                    options.append(payload[option_key])
-            
-            formatted_questions.append({
+        # One scroll returns one record type - check it once rather than per question
+        if hasattr(questions[0], 'payload'):
+            # Qdrant Record objects
+            records = [(q.id, q.payload) for q in questions]
+        else:
+            # Fallback for dictionary format
+            records = [(q.get('id', ''), q.get('payload', {})) for q in questions]
+        
+        return [
+            {
                 "id": str(question_id),
                 "question": payload.get('question', ''),
-                "options": options,
+                "options": [payload[key] for key in OPTION_KEYS if key in payload],
                 "correct_answer": payload.get('answer', ''),
                 "topic": payload.get('topic', 'Unknown'),
                 "difficulty": payload.get('difficulty', 'medium'),
                 "explanation": payload.get('notes', '')
-            })
-        
-        return formatted_questions
+            }
+            for question_id, payload in records
+        ]
 
 # Global instance
-adaptive_quiz_service = AdaptiveQuizService() 
\ No newline at end of file
+adaptive_quiz_service = AdaptiveQuizService()
+on_collection_updated(adaptive_quiz_service.invalidate_topics_cache) 
\ No newline at end of file
@@ -0,0 +1,36 @@
+"""
+Circuit Breaker - stops calling a failing dependency until it has had time to recover
+"""
+import time
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency while its breaker is open"""
+
+class CircuitBreaker:
+    """
+    Opens after fail_max consecutive failures. Once reset_timeout seconds pass,
+    calls are let through again; the first success closes the breaker and
+    another failure re-opens it for a full reset_timeout.
+    """
+    def __init__(self, name: str, fail_max: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        return self._failures >= self.fail_max and time.monotonic() - self._opened_at < self.reset_timeout
+
+    def check(self) -> None:
+        if self.is_open:
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def record_success(self) -> None:
+        self._failures = 0
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._failures >= self.fail_max:
+            self._opened_at = time.monotonic()
@@ -2,16 +2,52 @@
 Gemini LLM Learning Path Enhancer
 Uses Google's Gemini LLM to provide intelligent, personalized learning recommendations
 """
+import asyncio
+import logging
 import os
 import google.generativeai as genai
 from typing import Dict, List, Optional
 import json
+from src.services.breaker import CircuitBreaker
 from src.models.learning_path_models import (
     EnhancedRecommendations, Milestone, PersonalizedStrategy, StudySchedule,
     RealWorldApplication, ProgressTracking, AdaptiveLearning, ComplementaryResource,
     DifficultyProgression, GamificationElement
 )
 
+logger = logging.getLogger(__name__)
+
+# Static fallback milestones, built once at import
+_FALLBACK_MILESTONES = (
+    {
+        "milestone_id": "milestone_1",
+        "name": "Complete Basic Concepts",
+        "description": "Master fundamental principles",
+        "success_criteria": ["Understand core concepts", "Complete practice exercises"],
+        "estimated_time": 30,
+        "motivation": "Build strong foundation for advanced topics",
+        "practical_application": "Apply concepts to simple scenarios"
+    },
+)
+
+def item_key(item) -> str:
+    """
+    Dedup key for merged list items - an id field when present, otherwise the whole item.
+    Display names are not keys: different recommendations can share one.
+    """
+    if isinstance(item, dict):
+        key = item.get('id') or item.get('skill_id') or item.get('milestone_id')
+        if key is not None:
+            return str(key)  # ids may be ints
+        # sort_keys so the same item from two LLM responses matches regardless of key order
+        return json.dumps(item, sort_keys=True, default=str)
+    return item if isinstance(item, str) else str(item)
+
+# Per-call ceiling so one slow generation can't hold the dashboard open
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "20"))
+# Caps in-flight Gemini calls per worker - dashboards fan out to five calls each
+GEMINI_SEM = asyncio.Semaphore(int(os.getenv("GEMINI_CONCURRENCY", "16")))
+
 class GeminiLearningEnhancer:
     def __init__(self):
         # Initialize Gemini
@@ -21,6 +57,12 @@ class GeminiLearningEnhancer:
         
         genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel('gemini-1.5-flash')
+        # While open, every method fails fast into its rule-based fallback
+        self.breaker = CircuitBreaker(
+            "gemini",
+            fail_max=int(os.getenv("GEMINI_BREAKER_FAIL_MAX", "5")),
+            reset_timeout=float(os.getenv("GEMINI_BREAKER_RESET_TIMEOUT", "30"))
+        )
     
     def _get_standardized_enhancement_structure(self) -> Dict:
         """
@@ -45,10 +87,10 @@ class GeminiLearningEnhancer:
         """
         try:
             # Validate the entire structure
-            validated = EnhancedRecommendations(**data)
+            validated = EnhancedRecommendations.model_validate(data)
             return validated.model_dump()
         except Exception as e:
-            print(f"⚠️ Validation failed, cleaning data: {e}")
+            logger.warning("Validation failed, cleaning data: %s", e)
             # Clean and fix the data
             cleaned = self._get_standardized_enhancement_structure()
             
@@ -140,7 +182,7 @@ class GeminiLearningEnhancer:
                                     elements.append(element_data)
                             cleaned[field] = elements
                     except Exception as field_error:
-                        print(f"⚠️ Error processing field {field}: {field_error}")
+                        logger.warning("Error processing field %s: %s", field, field_error)
                         cleaned[field] = default_value
                 else:
                     cleaned[field] = default_value
@@ -154,7 +196,7 @@ class GeminiLearningEnhancer:
         try:
             # Handle None or invalid input
             if not milestones or not isinstance(milestones, list):
-                print(f"⚠️ Invalid milestones input: {type(milestones)}")
+                logger.warning("Invalid milestones input: %s", type(milestones))
                 return self._get_fallback_milestones({})
             
             validated_milestones = []
@@ -162,7 +204,7 @@ class GeminiLearningEnhancer:
                 try:
                     # Ensure milestone_data is a dictionary
                     if not isinstance(milestone_data, dict):
-                        print(f"⚠️ Milestone {i} is not a dict: {type(milestone_data)}")
+                        logger.warning("Milestone %s is not a dict: %s", i, type(milestone_data))
                         continue
                     
                     # Provide default values for missing required fields
@@ -185,12 +227,12 @@ class GeminiLearningEnhancer:
                             milestone_data[key] = default_value
                     
                     # Validate with Pydantic
-                    milestone = Milestone(**milestone_data)
+                    milestone = Milestone.model_validate(milestone_data)
                     validated_milestones.append(milestone.model_dump())
                     
                 except Exception as e:
-                    print(f"⚠️ Invalid milestone data for milestone {i}: {e}")
-                    print(f"⚠️ Milestone data: {milestone_data}")
+                    logger.warning("Invalid milestone data for milestone %s: %s", i, e)
+                    logger.warning("Milestone data: %s", milestone_data)
                     
                     # Create a fallback milestone
                     fallback = Milestone(
@@ -209,7 +251,7 @@ class GeminiLearningEnhancer:
             
             return validated_milestones
         except Exception as e:
-            print(f"⚠️ Milestone validation failed: {e}")
+            logger.warning("Milestone validation failed: %s", e)
             return self._get_fallback_milestones({})
 
     def _merge_enhancements(self, existing: Dict, new: Dict) -> Dict:
@@ -229,9 +271,9 @@ class GeminiLearningEnhancer:
             if field in existing:
                 if isinstance(value, list) and isinstance(existing[field], list):
                     # Merge lists, avoiding duplicates
-                    existing_ids = {item.get('id', item.get('name', str(item))) for item in existing[field] if item}
+                    existing_ids = {item_key(item) for item in existing[field] if item}
                     for item in value:
-                        item_id = item.get('id', item.get('name', str(item)))
+                        item_id = item_key(item)
                         if item_id not in existing_ids:
                             existing[field].append(item)
                 elif isinstance(value, dict) and isinstance(existing[field], dict):
@@ -264,7 +306,7 @@ class GeminiLearningEnhancer:
             return enhanced_path
             
         except Exception as e:
-            print(f"⚠️ LLM enhancement failed: {e}")
+            logger.warning("LLM enhancement failed: %s", e)
             # Return base path if LLM fails
             return base_path
 
@@ -275,23 +317,23 @@ class GeminiLearningEnhancer:
         enhanced_path = base_path.copy()
         
         try:
-            print(f"🔍 Parsing LLM response...")
-            print(f"🔍 Response type: {type(response)}")
-            print(f"🔍 Response preview: {str(response)[:300]}...")
+            logger.debug("Parsing LLM response...")
+            logger.debug("Response type: %s", type(response))
+            logger.debug("Response preview: %.300s...", response)
             
             # Parse LLM response
             llm_insights = self._parse_llm_response(response)
             
-            print(f"🔍 Parsed insights type: {type(llm_insights)}")
-            print(f"🔍 Parsed insights keys: {list(llm_insights.keys()) if isinstance(llm_insights, dict) else 'Not a dict'}")
+            logger.debug("Parsed insights type: %s", type(llm_insights))
+            logger.debug("Parsed insights keys: %s", list(llm_insights.keys()) if isinstance(llm_insights, dict) else 'Not a dict')
             
             # Ensure llm_insights is a dictionary
             if not isinstance(llm_insights, dict):
-                print(f"⚠️ LLM insights is not a dictionary: {type(llm_insights)}")
+                logger.warning("LLM insights is not a dictionary: %s", type(llm_insights))
                 return enhanced_path
             
             # Skip milestones - they're handled separately by generate_learning_milestones
-            print("ℹ️ Skipping milestones in enhance_learning_path (handled separately)")
+            logger.debug("Skipping milestones in enhance_learning_path (handled separately)")
             
             # Add enhanced recommendations if available - ensure consistent structure
             if llm_insights.get("enhanced_recommendations"):
@@ -306,11 +348,11 @@ class GeminiLearningEnhancer:
                         enhanced_path["enhanced_recommendations"],
                         enhanced_recs
                     )
-                    print(f"✅ Successfully integrated enhanced recommendations with {len(enhanced_recs)} fields")
+                    logger.debug("Successfully integrated enhanced recommendations with %s fields", len(enhanced_recs))
                 else:
-                    print(f"⚠️ Enhanced recommendations is not a valid dict: {type(enhanced_recs)} (length: {len(enhanced_recs) if isinstance(enhanced_recs, dict) else 'N/A'})")
+                    logger.warning("Enhanced recommendations is not a valid dict: %s (length: %s)", type(enhanced_recs), len(enhanced_recs) if isinstance(enhanced_recs, dict) else 'N/A')
             else:
-                print("ℹ️ No enhanced recommendations found in LLM insights")
+                logger.debug("No enhanced recommendations found in LLM insights")
             
             # Add personalized strategies if available
             if llm_insights.get("personalized_strategies"):
@@ -318,7 +360,7 @@ class GeminiLearningEnhancer:
                 if isinstance(strategies, list):
                     enhanced_path["personalized_strategies"] = strategies
                 else:
-                    print(f"⚠️ Personalized strategies is not a list: {type(strategies)}")
+                    logger.warning("Personalized strategies is not a list: %s", type(strategies))
             
             # Add study schedule if available
             if llm_insights.get("study_schedule"):
@@ -326,7 +368,7 @@ class GeminiLearningEnhancer:
                 if isinstance(schedule, dict):
                     enhanced_path["study_schedule"] = schedule
                 else:
-                    print(f"⚠️ Study schedule is not a dict: {type(schedule)}")
+                    logger.warning("Study schedule is not a dict: %s", type(schedule))
             
             # Add real-world applications if available
             if llm_insights.get("real_world_applications"):
@@ -334,14 +376,14 @@ class GeminiLearningEnhancer:
                 if isinstance(applications, list):
                     enhanced_path["real_world_applications"] = applications
                 else:
-                    print(f"⚠️ Real world applications is not a list: {type(applications)}")
+                    logger.warning("Real world applications is not a list: %s", type(applications))
             
-            print(f"✅ Integrated {len(llm_insights)} LLM insights (excluding milestones)")
+            logger.debug("Integrated %s LLM insights (excluding milestones)", len(llm_insights))
             
         except Exception as e:
-            print(f"⚠️ Error integrating LLM insights: {e}")
-            print(f"⚠️ Response type: {type(response)}")
-            print(f"⚠️ Response preview: {str(response)[:200]}...")
+            logger.warning("Error integrating LLM insights: %s", e)
+            logger.warning("Response type: %s", type(response))
+            logger.warning("Response preview: %.200s...", response)
         
         return enhanced_path
     
@@ -379,7 +421,7 @@ class GeminiLearningEnhancer:
             return tips if tips else self._get_fallback_tips(skill)
             
         except Exception as e:
-            print(f"⚠️ LLM tips generation failed: {e}")
+            logger.warning("LLM tips generation failed: %s", e)
             return self._get_fallback_tips(skill)
     
     async def analyze_skill_gaps_intelligently(self, user_progress: Dict, available_skills: List) -> List[str]:
@@ -439,7 +481,7 @@ class GeminiLearningEnhancer:
             return analysis if analysis else self._get_fallback_analysis(user_progress, available_skills)
             
         except Exception as e:
-            print(f"⚠️ LLM skill gap analysis failed: {e}")
+            logger.warning("LLM skill gap analysis failed: %s", e)
             return self._get_fallback_analysis(user_progress, available_skills)
     
     async def generate_learning_milestones(self, learning_path: Dict, user_context: Dict) -> List[Dict]:
@@ -501,14 +543,11 @@ class GeminiLearningEnhancer:
             response = await self._get_llm_response(prompt)
             milestones = self._parse_milestones_response(response)
             
-            # Validate and clean the milestones
-            if milestones:
-                milestones = self._validate_milestones(milestones)
-            
+            # Callers run _validate_milestones on the final payload
             return milestones if milestones else self._get_fallback_milestones(learning_path)
             
         except Exception as e:
-            print(f"⚠️ LLM milestone generation failed: {e}")
+            logger.warning("LLM milestone generation failed: %s", e)
             return self._get_fallback_milestones(learning_path)
     
     async def generate_comprehensive_enhancements(self, learning_path: Dict, user_context: Dict, user_progress: Dict) -> Dict:
@@ -616,7 +655,7 @@ class GeminiLearningEnhancer:
             return enhancements if enhancements else self._get_fallback_enhancements()
             
         except Exception as e:
-            print(f"⚠️ LLM comprehensive enhancement failed: {e}")
+            logger.warning("LLM comprehensive enhancement failed: %s", e)
             return self._get_fallback_enhancements()
 
     def _get_fallback_enhancements(self) -> Dict:
@@ -783,6 +822,7 @@ class GeminiLearningEnhancer:
         """
         Get response from Gemini LLM with improved system instructions
         """
+        self.breaker.check()
         try:
             # Add system-level instructions to ensure JSON-only output
             system_instruction = """
@@ -795,10 +835,18 @@ class GeminiLearningEnhancer:
             
             enhanced_prompt = f"{system_instruction}\n\n{prompt}"
             
-            response = self.model.generate_content(enhanced_prompt)
+            # Async client so concurrent enhancement calls overlap instead of blocking the loop
+            async with GEMINI_SEM:
+                response = await asyncio.wait_for(
+                    self.model.generate_content_async(enhanced_prompt),
+                    timeout=GEMINI_TIMEOUT
+                )
+            self.breaker.record_success()
             return response.text
         except Exception as e:
-            print(f"❌ Gemini API call failed: {e}")
+            if not isinstance(e, ValueError):  # .text raises ValueError on blocked output - the API itself is fine
+                self.breaker.record_failure()
+            logger.error("Gemini API call failed: %r", e)
             raise
     
     def _clean_and_validate_json(self, json_str: str) -> Dict:
@@ -844,8 +892,8 @@ class GeminiLearningEnhancer:
             return json.loads(cleaned)
             
         except json.JSONDecodeError as e:
-            print(f"⚠️ JSON cleaning failed: {e}")
-            print(f"⚠️ Attempted to clean: {json_str[:200]}...")
+            logger.warning("JSON cleaning failed: %s", e)
+            logger.warning("Attempted to clean: %.200s...", json_str)
             return {}
 
     def _parse_llm_response(self, response: str) -> Dict:
@@ -912,7 +960,7 @@ class GeminiLearningEnhancer:
             
             # If we found a valid JSON object, return it
             if best_json:
-                print(f"✅ Successfully parsed JSON from LLM response (length: {max_length})")
+                logger.debug("Successfully parsed JSON from LLM response (length: %s)", max_length)
                 return best_json
             
             # Fallback: try to extract any JSON-like structure and clean it
@@ -931,18 +979,18 @@ class GeminiLearningEnhancer:
                 # Sometimes the LLM returns pure JSON
                 parsed = json.loads(cleaned_response)
                 if isinstance(parsed, dict):
-                    print("✅ Successfully parsed entire response as JSON")
+                    logger.debug("Successfully parsed entire response as JSON")
                     return parsed
             except json.JSONDecodeError:
                 pass
             
-            print(f"⚠️ No valid JSON found in LLM response")
-            print(f"⚠️ Response preview: {cleaned_response[:200]}...")
+            logger.warning("No valid JSON found in LLM response")
+            logger.warning("Response preview: %.200s...", cleaned_response)
             return {}
             
         except Exception as e:
-            print(f"⚠️ Error parsing LLM response: {e}")
-            print(f"⚠️ Raw response: {response[:200]}...")
+            logger.warning("Error parsing LLM response: %s", e)
+            logger.warning("Raw response: %.200s...", response)
             return {}
     
     def _parse_tips_response(self, response: str) -> List[str]:
@@ -1013,17 +1061,8 @@ class GeminiLearningEnhancer:
         """
         Fallback milestones if LLM fails
         """
-        return [
-            {
-                "milestone_id": "milestone_1",
-                "name": "Complete Basic Concepts",
-                "description": "Master fundamental principles",
-                "success_criteria": ["Understand core concepts", "Complete practice exercises"],
-                "estimated_time": 30,
-                "motivation": "Build strong foundation for advanced topics",
-                "practical_application": "Apply concepts to simple scenarios"
-            }
-        ]
+        # Callers fill in missing fields in place, so hand out fresh copies
+        return [dict(milestone) for milestone in _FALLBACK_MILESTONES]
 
 # Global instance
 gemini_enhancer = GeminiLearningEnhancer() 
\ No newline at end of file
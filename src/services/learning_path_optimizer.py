@@ -5,6 +5,11 @@ from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 import json
+import os
+import time
+
+# The vector DB skill catalog only changes when new questions are indexed
+SKILLS_CACHE_TTL = int(os.getenv("SKILLS_CACHE_TTL", "600"))  # seconds
 
 class LearningStyle(Enum):
     VISUAL = "visual"
@@ -46,6 +51,8 @@ class LearningPathOptimizer:
     def __init__(self):
         # Initialize skill dependency graph
         self.skill_graph = self._build_skill_graph()
+        # (expires_at, skills) snapshot of the vector DB catalog
+        self._skills_cache: Optional[Tuple[float, List[Dict]]] = None
         
     def _build_skill_graph(self) -> Dict[str, SkillNode]:
         """
@@ -307,12 +314,15 @@ class LearningPathOptimizer:
         
         # Alternative 3: Comprehensive path (include all related skills)
         comprehensive = []
+        comprehensive_ids = set()
         for node in primary_path:
             comprehensive.append(node)
+            comprehensive_ids.add(node.id)
             # Add related skills
             for related_id in node.related_skills:
-                if related_id in self.skill_graph and related_id not in [n.id for n in comprehensive]:
+                if related_id in self.skill_graph and related_id not in comprehensive_ids:
                     comprehensive.append(self.skill_graph[related_id])
+                    comprehensive_ids.add(related_id)
         
         if comprehensive != primary_path:
             alternatives.append(comprehensive)
@@ -348,15 +358,22 @@ class LearningPathOptimizer:
             return 0.0
         
         # Factors affecting confidence:
+        # First position of each skill in the sequence, built once for O(1) lookups
+        first_position = {}
+        for i, node in enumerate(sequence):
+            first_position.setdefault(node.id, i)
+        
         # 1. Coverage of skill gaps
-        coverage = len([skill for skill in skill_gaps if skill in [node.id for node in sequence]])
+        coverage = sum(1 for skill in skill_gaps if skill in first_position)
         coverage_score = coverage / len(skill_gaps) if skill_gaps else 1.0
         
         # 2. Prerequisite satisfaction
         prereq_satisfaction = 1.0
         for node in sequence:
+            node_position = first_position[node.id]
             for prereq in node.prerequisites:
-                if prereq not in [n.id for n in sequence[:sequence.index(node)]]:
+                # Missing unless the prerequisite appears earlier in the sequence
+                if first_position.get(prereq, node_position) >= node_position:
                     prereq_satisfaction *= 0.8  # Reduce confidence for missing prereqs
         
         # 3. Difficulty progression
@@ -429,16 +446,19 @@ class LearningPathOptimizer:
         """
         Find the next logical skill to learn from vector database data
         """
-        available_skills = [skill for skill in all_skills_data if skill["id"] not in current_skills]
+        # Set lookup instead of scanning the current_skills list for every check
+        current_skill_set = set(current_skills)
+        available_skills = [skill for skill in all_skills_data if skill["id"] not in current_skill_set]
         
         if not available_skills:
             return None
         
         # Score each available skill
         skill_scores = {}
+        skills_by_id = {}
         for skill in available_skills:
             # Check if prerequisites are met
-            prereqs_met = all(prereq in current_skills for prereq in skill.get("prerequisites", []))
+            prereqs_met = all(prereq in current_skill_set for prereq in skill.get("prerequisites", []))
             if not prereqs_met:
                 continue
             
@@ -457,7 +477,7 @@ class LearningPathOptimizer:
             # 3. Related to current skills
             related_skills = skill.get("related_skills", [])
             if related_skills:
-                related_count = len([s for s in related_skills if s in current_skills])
+                related_count = sum(1 for s in related_skills if s in current_skill_set)
                 score += (related_count / len(related_skills)) * 0.2
             
             # 4. Difficulty progression (prefer easier skills)
@@ -468,13 +488,14 @@ class LearningPathOptimizer:
                 score += 0.05
             
             skill_scores[skill["id"]] = score
+            skills_by_id.setdefault(skill["id"], skill)
         
         if not skill_scores:
             return None
         
         # Return skill with highest score
         best_skill_id = max(skill_scores, key=skill_scores.get)
-        return next(skill for skill in all_skills_data if skill["id"] == best_skill_id)
+        return skills_by_id[best_skill_id]
     
     def _get_learning_tips_from_vector_db(self, skill_data: Dict, user_preferences: Dict) -> List[str]:
         """
@@ -524,15 +545,23 @@ class LearningPathOptimizer:
 
     def get_all_available_skills(self) -> List[Dict]:
         """
-        Get all available skills in the system - now from vector database for accuracy
+        Get all available skills in the system - now from vector database for accuracy.
+        Vector DB results are cached for SKILLS_CACHE_TTL seconds; callers share the list, so treat it as read-only.
         """
+        cached = self._skills_cache
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
         try:
             # Try to get skills from vector database first (more accurate)
-            from src.vector_store.qdrant_utils import get_all_available_skills_from_vector_db
+            from src.vector_store.qdrant_utils import get_all_available_skills_from_vector_db, on_collection_updated
+            # Only a filled cache can go stale - register once it is about to be
+            on_collection_updated(self.invalidate_skills_cache)
             vector_skills = get_all_available_skills_from_vector_db()
             
             if vector_skills:
                 print(f"🎯 Using {len(vector_skills)} skills from vector database")
+                self._skills_cache = (time.monotonic() + SKILLS_CACHE_TTL, vector_skills)
                 return vector_skills
             else:
                 print("⚠️ No skills found in vector DB, falling back to hardcoded skills")
@@ -561,6 +590,10 @@ class LearningPathOptimizer:
         skills.sort(key=lambda x: (x["importance_score"], x["difficulty"]), reverse=True)
         return skills
     
+    def invalidate_skills_cache(self) -> None:
+        """Drop the cached catalog, e.g. after indexing new questions"""
+        self._skills_cache = None
+    
     def _get_hardcoded_labels(self, skill_node: SkillNode) -> List[str]:
         """Generate labels for hardcoded skills"""
         labels = []
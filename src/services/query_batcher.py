@@ -0,0 +1,99 @@
+"""
+Query Batcher - groups concurrent RAG queries into one embedding call and one Qdrant round trip
+"""
+import asyncio
+import logging
+import os
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.rag.graph import agenerate_response_node, batch_retrieve
+
+logger = logging.getLogger(__name__)
+
+QUERY_BATCH_SIZE = int(os.getenv("QUERY_BATCH_SIZE", "16"))
+QUERY_BATCH_MAX_WAIT_MS = int(os.getenv("QUERY_BATCH_MAX_WAIT_MS", "75"))
+
+class QueryBatcher:
+    """
+    asyncio.Queue-backed dispatcher in front of the RAG graph. A background task
+    collects up to batch_size queries or waits max_wait_ms, whichever comes first.
+    When nothing else is queued or running, a lone query goes straight through
+    the compiled graph without waiting for the window.
+    """
+    def __init__(self, rag_graph, batch_size: int = QUERY_BATCH_SIZE, max_wait_ms: int = QUERY_BATCH_MAX_WAIT_MS):
+        self.rag_graph = rag_graph
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight: Set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._collect())
+
+    async def stop(self) -> None:
+        if self._worker:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+        await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    async def submit(self, inputs: Dict) -> Dict:
+        """Queue one set of graph inputs and wait for its final state"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((inputs, future))
+        return await future
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            if self._queue.empty() and not self._in_flight:
+                # Idle system - nothing to coalesce with
+                self._dispatch(batch)
+                continue
+
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: List[Tuple[Dict, asyncio.Future]]) -> None:
+        # Process off the collector so the next window opens immediately
+        task = asyncio.create_task(self._process(batch))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _process(self, batch: List[Tuple[Dict, asyncio.Future]]) -> None:
+        try:
+            if len(batch) == 1:
+                results = [await self.rag_graph.ainvoke(batch[0][0])]
+            else:
+                states = await asyncio.to_thread(batch_retrieve, [inputs for inputs, _ in batch])
+                # LLM explanations stay per query - run them side by side
+                updates = await asyncio.gather(
+                    *(agenerate_response_node(state) for state in states),
+                    return_exceptions=True
+                )
+                # Nodes return deltas - fold them into the final state like the graph does
+                results = [
+                    update if isinstance(update, BaseException) else {**state, **update}
+                    for state, update in zip(states, updates)
+                ]
+        except Exception as e:
+            logger.exception("RAG batch of %d failed", len(batch))
+            results = [e] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue  # Caller went away
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -0,0 +1,91 @@
+"""
+Semantic Cache - reuses responses for queries that are near-duplicates of earlier ones
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_TTL = int(os.getenv("SEMANTIC_CACHE_TTL", "3600"))  # seconds
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "2048"))
+# Raw Qdrant hits go stale faster than they are reused - keep them briefly
+RETRIEVAL_CACHE_TTL = int(os.getenv("RETRIEVAL_CACHE_TTL", "300"))  # seconds
+
+class SemanticCache:
+    """
+    Fixed-size ring buffer of normalized query embeddings and their responses.
+    Lookups do one exact cosine scan over the buffer - at this size a single
+    matrix-vector product is cheaper than maintaining an LSH index and never misses.
+    """
+    def __init__(
+        self,
+        threshold: float = SEMANTIC_CACHE_THRESHOLD,
+        ttl: int = SEMANTIC_CACHE_TTL,
+        max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES,
+        dim: int = 384
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+        self._expires = np.zeros(max_entries, dtype=np.float64)  # 0 = empty slot
+        self._namespace_ids = np.full(max_entries, -1, dtype=np.int32)
+        self._values = [None] * max_entries
+        self._namespaces: Dict[str, int] = {}
+        self._next_slot = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, namespace: str, embedding: np.ndarray) -> Optional[Any]:
+        """Return the cached value for the most similar query above threshold, if any"""
+        with self._lock:
+            namespace_id = self._namespaces.get(namespace)
+            if namespace_id is not None:
+                scores = self._vectors @ embedding
+                valid = (self._namespace_ids == namespace_id) & (self._expires > time.monotonic())
+                scores[~valid] = -1.0
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self._hits += 1
+                    return self._values[best]
+            self._misses += 1
+            return None
+
+    def store(self, namespace: str, embedding: np.ndarray, value: Any) -> None:
+        """Insert a value, overwriting the oldest slot once the buffer is full"""
+        with self._lock:
+            namespace_id = self._namespaces.setdefault(namespace, len(self._namespaces))
+            slot = self._next_slot
+            self._vectors[slot] = embedding
+            self._expires[slot] = time.monotonic() + self.ttl
+            self._namespace_ids[slot] = namespace_id
+            self._values[slot] = value
+            self._next_slot = (slot + 1) % self.max_entries
+
+    def invalidate(self) -> None:
+        """Drop every entry - call after the underlying collection changes"""
+        with self._lock:
+            self._expires[:] = 0
+            self._namespace_ids[:] = -1
+            self._values = [None] * self.max_entries
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": int(np.count_nonzero(self._expires > time.monotonic())),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "threshold": self.threshold,
+                "ttl": self.ttl
+            }
+
+# Global instances - API responses, and the top-k hits behind them for the RAG graph
+semantic_cache = SemanticCache()
+retrieval_cache = SemanticCache(ttl=RETRIEVAL_CACHE_TTL)
@@ -1,23 +1,34 @@
+import asyncio
 import hashlib
 import os
 from dotenv import load_dotenv
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import (
+    Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue, QueryRequest,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType, SearchParams, QuantizationSearchParams,
+    PayloadSchemaType
+)
 import pandas as pd
 from collections import defaultdict
-from src.llm.embedder import get_embedding
-from typing import List, Dict
+from src.llm.embedder import embed_texts, get_embedding
+from typing import Callable, List, Dict, Optional
 
 load_dotenv()
 
 QDRANT_URL = os.getenv("QDRANT_URL")
 QDRANT_API_KEY = os.getenv("QDRANT_API_KEY")
+# gRPC sends protobuf instead of JSON - set to "true" when the server's gRPC port (6334) is reachable
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
+# Keep the one long-lived gRPC channel warm between requests
+QDRANT_GRPC_OPTIONS = {"grpc.keepalive_time_ms": 30000, "grpc.keepalive_permit_without_calls": 1}
 
 if QDRANT_URL:
     # Cloud deployment
     qdrant_client = QdrantClient(
         url=QDRANT_URL,
-        api_key=QDRANT_API_KEY
+        api_key=QDRANT_API_KEY,
+        prefer_grpc=QDRANT_PREFER_GRPC,
+        grpc_options=QDRANT_GRPC_OPTIONS
     )
     print(f"🔗 Connected to Qdrant Cloud: {QDRANT_URL}")
 else:
@@ -25,15 +36,81 @@ else:
     qdrant_client = QdrantClient(path="data/qdrant")
     print("🔗 Connected to local Qdrant")
 
+_async_client: Optional[AsyncQdrantClient] = None
+
+# Run after points are upserted - caches derived from the collection register here
+_collection_update_hooks: List[Callable[[], None]] = []
+
+def on_collection_updated(callback: Callable[[], None]) -> None:
+    """Register a callback to run after new points land; registering twice is a no-op"""
+    if callback not in _collection_update_hooks:
+        _collection_update_hooks.append(callback)
+
+def _notify_collection_updated() -> None:
+    for callback in _collection_update_hooks:
+        try:
+            callback()
+        except Exception as e:
+            # The upsert itself succeeded - a stale cache must not make it look failed
+            print(f"⚠️ Collection update hook {callback!r} failed: {e}")
+
+def get_async_client() -> Optional[AsyncQdrantClient]:
+    """Shared async client for the server deployment - None in local mode, whose storage takes one client"""
+    global _async_client
+    if _async_client is None and QDRANT_URL:
+        _async_client = AsyncQdrantClient(
+            url=QDRANT_URL,
+            api_key=QDRANT_API_KEY,
+            prefer_grpc=QDRANT_PREFER_GRPC,
+            grpc_options=QDRANT_GRPC_OPTIONS
+        )
+    return _async_client
+
+async def close_clients() -> None:
+    """Release the process-wide connections on shutdown"""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.close()
+        _async_client = None
+    qdrant_client.close()
+
 COLLECTION_NAME = "gktoday_questions"
 VECTOR_SIZE = 384
 
+# INT8 copies of the vectors stay in RAM for the HNSW walk; the top candidates are rescored
+# against the full-precision vectors so recall is unchanged
+QUANTIZATION_CONFIG = ScalarQuantization(
+    scalar=ScalarQuantizationConfig(type=ScalarType.INT8, always_ram=True)
+)
+SEARCH_PARAMS = SearchParams(quantization=QuantizationSearchParams(rescore=True, oversampling=2.0))
+
 existing_collections = [col.name for col in qdrant_client.get_collections().collections]
 if COLLECTION_NAME not in existing_collections:
     qdrant_client.create_collection(
         collection_name=COLLECTION_NAME,
-        vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE)
+        vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE),
+        quantization_config=QUANTIZATION_CONFIG
     )
+elif QDRANT_URL:
+    # Collections created before quantization was added - without this, rescore/oversampling do nothing.
+    # Server only: local storage ignores quantization settings
+    try:
+        if qdrant_client.get_collection(COLLECTION_NAME).config.quantization_config is None:
+            qdrant_client.update_collection(collection_name=COLLECTION_NAME, quantization_config=QUANTIZATION_CONFIG)
+            print(f"🔧 Enabled INT8 quantization on {COLLECTION_NAME} - the server builds it in the background")
+    except Exception as e:
+        print(f"⚠️ Could not ensure quantization on {COLLECTION_NAME}: {e}")
+
+# Keyword indexes back the topic/difficulty filters and let facet() list distinct topics server-side
+for field_name in ("topic", "difficulty"):
+    try:
+        qdrant_client.create_payload_index(
+            collection_name=COLLECTION_NAME,
+            field_name=field_name,
+            field_schema=PayloadSchemaType.KEYWORD
+        )
+    except Exception as e:
+        print(f"⚠️ Could not ensure payload index on {field_name}: {e}")
 
 def generate_question_id(row):
     unique_string = f"{row['Date']}_{row['Question']}"
@@ -45,8 +122,8 @@ def add_questions_to_qdrant(df):
     if missing:
         raise ValueError(f"Missing required columns: {missing}")
 
-    points = []
-    added, skipped = 0, 0
+    texts, ids, payloads = [], [], []
+    skipped = 0
     seen_ids = set()
 
     for idx, row in df.iterrows():
@@ -58,10 +135,9 @@ def add_questions_to_qdrant(df):
             continue
         seen_ids.add(question_id)
 
-        text_for_embedding = f"{row['Question']} {row.get('Notes', '')} {row.get('Topic', '')} {row.get('Difficulty', '')}"
-        embedding = get_embedding(text_for_embedding)
-
-        payload = {
+        texts.append(f"{row['Question']} {row.get('Notes', '')} {row.get('Topic', '')} {row.get('Difficulty', '')}")
+        ids.append(question_id)
+        payloads.append({
             "uuid": question_id,
             "date": str(row['Date']),
             "question": row['Question'],
@@ -73,17 +149,43 @@ def add_questions_to_qdrant(df):
             "notes": row.get('Notes', ''),
             "topic": row.get('Topic', 'Unknown'),
             "difficulty": row.get('Difficulty', 'Medium')
-        }
+        })
 
-        points.append(PointStruct(id=question_id, vector=embedding, payload=payload))
-        added += 1
+    # One batched encode for the whole frame - documents stay out of the query memo
+    embeddings = embed_texts(texts, batch_size=64) if texts else []
+    points = [
+        PointStruct(id=question_id, vector=embedding, payload=payload)
+        for question_id, embedding, payload in zip(ids, embeddings, payloads)
+    ]
+    added = len(points)
 
     if points:
         qdrant_client.upsert(collection_name=COLLECTION_NAME, points=points)
+        # Cached hits, responses and topic/skill catalogs no longer reflect the collection
+        _notify_collection_updated()
     print(f"✅ {added} new questions added to Qdrant, {skipped} skipped (duplicates in batch).")
 
-def search_similar_questions(query, top_k=5, filters=None):
-    query_embedding = get_embedding(query)
+def _format_hit(point) -> Dict:
+    payload = point.payload
+    return {
+        "uuid": payload.get("uuid"),
+        "question": payload.get("question"),
+        "options": {
+            "a": payload.get("option_a"),
+            "b": payload.get("option_b"),
+            "c": payload.get("option_c"),
+            "d": payload.get("option_d"),
+        },
+        "answer": payload.get("answer"),
+        "notes": payload.get("notes", ""),
+        "topic": payload.get("topic"),
+        "difficulty": payload.get("difficulty"),
+        "score": point.score
+    }
+
+def search_similar_questions(query, top_k=5, filters=None, query_embedding=None):
+    if query_embedding is None:
+        query_embedding = get_embedding(query)
 
     search_filter = None
     if filters:
@@ -95,31 +197,41 @@ def search_similar_questions(query, top_k=5, filters=None):
         query=query_embedding,  # Pass list of floats directly
         limit=top_k,
         query_filter=search_filter,
+        search_params=SEARCH_PARAMS,
         with_payload=True
     )
 
     # `response` contains `.points`, which hold payload and score
     hits = response.points if hasattr(response, "points") else response
 
-    results = []
-    for point in hits:
-        payload = point.payload
-        results.append({
-            "uuid": payload.get("uuid"),
-            "question": payload.get("question"),
-            "options": {
-                "a": payload.get("option_a"),
-                "b": payload.get("option_b"),
-                "c": payload.get("option_c"),
-                "d": payload.get("option_d"),
-            },
-            "answer": payload.get("answer"),
-            "notes": payload.get("notes", ""),
-            "topic": payload.get("topic"),
-            "difficulty": payload.get("difficulty"),
-            "score": point.score
-        })
-    return results
+    return [_format_hit(point) for point in hits]
+
+async def search_similar_questions_async(query, top_k=5, query_embedding=None):
+    """search_similar_questions for async callers - awaits the network call instead of holding a thread"""
+    client = get_async_client()
+    if client is None or query_embedding is None:
+        # Local storage allows a single client, and embedding is CPU work - both run in a worker thread
+        return await asyncio.to_thread(search_similar_questions, query, top_k, None, query_embedding)
+
+    response = await client.query_points(
+        collection_name=COLLECTION_NAME,
+        query=query_embedding,
+        limit=top_k,
+        search_params=SEARCH_PARAMS,
+        with_payload=True
+    )
+    return [_format_hit(point) for point in response.points]
+
+def search_similar_questions_batch(query_embeddings: List[List[float]], top_k=5) -> List[List[Dict]]:
+    """Run one similarity search per embedding in a single Qdrant round trip"""
+    responses = qdrant_client.query_batch_points(
+        collection_name=COLLECTION_NAME,
+        requests=[
+            QueryRequest(query=embedding, limit=top_k, params=SEARCH_PARAMS, with_payload=True)
+            for embedding in query_embeddings
+        ]
+    )
+    return [[_format_hit(point) for point in response.points] for response in responses]
 
 def get_all_available_skills_from_vector_db() -> List[Dict]:
     """
@@ -131,7 +243,8 @@ def get_all_available_skills_from_vector_db() -> List[Dict]:
             collection_name=COLLECTION_NAME,
             scroll_filter={},  # No filter to get all
             limit=10000,  # Get more to ensure we cover all topics
-            with_payload=True
+            with_payload=["topic", "difficulty"],  # Only the fields the skill catalog reads
+            with_vectors=False
         )
         
         if not response or not response[0]:
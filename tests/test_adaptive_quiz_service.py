@@ -0,0 +1,192 @@
+from itertools import product
+from types import SimpleNamespace
+
+import pytest
+from qdrant_client.models import FieldCondition, Filter, MatchAny
+
+from src.models.quiz_models import TopicRequest
+from src.services import adaptive_quiz_service as aqs
+from src.services.adaptive_quiz_service import AdaptiveQuizService
+
+CATALOG = ["Economy", "Environment", "History", "Polity", "Science"]
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+POINTS = [{"topic": t, "difficulty": d} for t, d in product(CATALOG + ["Current Affairs"], DIFFICULTIES)]
+
+def _as_list(conditions):
+    if conditions is None:
+        return []
+    return conditions if isinstance(conditions, list) else [conditions]
+
+def _matches(condition, point) -> bool:
+    """Evaluate a qdrant Filter or FieldCondition against a flat payload"""
+    if isinstance(condition, FieldCondition):
+        value = point[condition.key]
+        if isinstance(condition.match, MatchAny):
+            return value in condition.match.any
+        return value == condition.match.value
+    should = _as_list(condition.should)
+    return all(_matches(c, point) for c in _as_list(condition.must)) and (not should or any(_matches(c, point) for c in should))
+
+def _matches_old(config, point) -> bool:
+    """Evaluate the original dict filters"""
+    if "key" in config:
+        return point[config["key"]] == config["match"]["value"]
+    should = config.get("should", [])
+    return all(_matches_old(c, point) for c in config.get("must", [])) and (not should or any(_matches_old(c, point) for c in should))
+
+def _point_set(flt, matcher=_matches):
+    return {(p["topic"], p["difficulty"]) for p in POINTS if matcher(flt, p)}
+
+def _pairs(topics, difficulties):
+    return [
+        {"must": [{"key": "topic", "match": {"value": t}}, {"key": "difficulty", "match": {"value": d}}]}
+        for t in topics for d in difficulties
+    ]
+
+def _old_strategy_filter(strategy, user_topics, catalog, hour):
+    """The original build_adaptive_filter for the no-requests path, clause per (topic, difficulty)"""
+    if user_topics:
+        topics = user_topics + [t for t in catalog if t not in user_topics][:2]
+    else:
+        topics = catalog
+    topics = topics or ["Current Affairs"]
+    if strategy == "cold_start":
+        return {"should": _pairs(catalog, ["Easy"])}
+    if strategy == "remedial":
+        return {"should": _pairs(topics, ["Easy"])}
+    if strategy == "exploration":
+        if len(catalog) >= 2:
+            topic_pairs = [catalog[i:i + 2] for i in range(0, len(catalog), 2)]
+            new_topics = topic_pairs[hour % len(topic_pairs)]
+        else:
+            new_topics = catalog[:2]
+        return {"should": _pairs(topics, ["Easy"]) + _pairs(topics, ["Hard"]) + _pairs(new_topics, ["Easy"])}
+    if strategy == "advanced":
+        return {"should": _pairs(topics, ["Hard"]) + _pairs(topics, ["Medium"])}
+    return {"should": _pairs(topics, DIFFICULTIES)}
+
+@pytest.fixture
+def service(monkeypatch):
+    service = AdaptiveQuizService()
+    monkeypatch.setattr(service, "get_all_available_topics", lambda: CATALOG)
+    return service
+
+@pytest.mark.parametrize("strategy", ["cold_start", "remedial", "exploration", "advanced", "balanced", "unknown"])
+@pytest.mark.parametrize("user_topics", [[], ["Polity"], ["Science", "Polity", "Geography"]])
+@pytest.mark.parametrize("hour", [0, 1, 2, 5])
+def test_strategy_filters_match_original_point_sets(service, monkeypatch, strategy, user_topics, hour):
+    monkeypatch.setattr(aqs.time, "time", lambda: hour * 3600 + 1)
+    new = service.build_adaptive_filter({"strategy": strategy, "topics": user_topics})
+    old = _old_strategy_filter(strategy, user_topics, CATALOG, hour)
+    assert _point_set(new) == _point_set(old, _matches_old)
+
+def test_strategy_filters_without_catalog_fall_back(monkeypatch):
+    service = AdaptiveQuizService()
+    monkeypatch.setattr(service, "get_all_available_topics", lambda: [])
+    for strategy in ("remedial", "advanced", "balanced"):
+        new = service.build_adaptive_filter({"strategy": strategy, "topics": []})
+        old = _old_strategy_filter(strategy, [], [], 0)
+        assert _point_set(new) == _point_set(old, _matches_old)
+
+@pytest.mark.parametrize("requests, expected", [
+    ([{"topic": "Polity", "difficulty": "Hard"}], {("Polity", "Hard")}),
+    ([{"topic": "Polity"}], {("Polity", d) for d in DIFFICULTIES}),
+    ([TopicRequest(topic="Science", difficulty="Easy"), {"topic": "History", "difficulty": None}],
+     {("Science", "Easy")} | {("History", d) for d in DIFFICULTIES}),
+    ([{"topic": "Polity", "difficulty": "Hard"}, {"topic": "Polity", "difficulty": "Hard"}, {"topic": ""}], {("Polity", "Hard")}),
+    ([{"topic": ""}, {"difficulty": "Hard"}], {(t, "Easy") for t in CATALOG + ["Current Affairs"]}),
+])
+def test_request_filters_match_original_point_sets(service, requests, expected):
+    assert _point_set(service.build_adaptive_filter({"strategy": "balanced"}, requests)) == expected
+
+def test_request_filters_are_shared_regardless_of_order(service):
+    first = service.build_adaptive_filter({}, [{"topic": "Polity"}, {"topic": "Science", "difficulty": "Hard"}])
+    second = service.build_adaptive_filter({}, [TopicRequest(topic="Science", difficulty="Hard"), {"topic": "Polity"}])
+    assert first is second
+    assert isinstance(first, Filter)
+
+def _old_signals(topic_performance):
+    """The original _is_user_easy_heavy, _has_significant_gaps and missing-difficulty scan"""
+    counts = {d: sum(1 for data in topic_performance.values() if data[d] > 0) for d in ("easy", "medium", "hard")}
+    attempts = sum(counts.values())
+    easy_heavy = attempts > 0 and counts["easy"] / attempts > 0.6
+
+    total_topics = len(topic_performance)
+    accuracies = {
+        topic: [data[d] for d in ("easy", "medium", "hard") if data[d] > 0]
+        for topic, data in topic_performance.items()
+    }
+    no_attempts = sum(1 for accs in accuracies.values() if not accs)
+    gap_ratio = no_attempts / total_topics if total_topics else 0
+    has_gaps = gap_ratio > 0.25 or counts["medium"] < total_topics * 0.5 or counts["hard"] < total_topics * 0.3
+
+    missing = [d for data in topic_performance.values() for d in ("easy", "medium", "hard") if data[d] == 0]
+    return {"easy_heavy": easy_heavy, "has_gaps": has_gaps, "missing_difficulties": missing}
+
+def _performance(*rows):
+    return {f"T{i}": {"easy": e, "medium": m, "hard": h, "total_accuracy": 0} for i, (e, m, h) in enumerate(rows)}
+
+@pytest.mark.parametrize("topic_performance", [
+    {},
+    _performance((0, 0, 0)),
+    # 3 of 5 attempted pairs easy - exactly 60%, not easy-heavy
+    _performance((80, 70, 0), (60, 0, 50), (90, 0, 0)),
+    # 4 of 6 easy - easy-heavy
+    _performance((80, 70, 0), (60, 0, 50), (90, 0, 0), (75, 0, 0)),
+    # 1 of 4 topics unattempted - exactly 25%, medium in 2 of 4 (50%), hard in 2 of 4
+    _performance((80, 70, 60), (60, 50, 40), (90, 0, 0), (0, 0, 0)),
+    # 2 of 5 topics unattempted - over 25%
+    _performance((80, 70, 60), (60, 50, 40), (90, 80, 70), (0, 0, 0), (0, 0, 0)),
+    # medium in 1 of 3 topics - under half
+    _performance((80, 70, 60), (60, 0, 40), (90, 0, 70)),
+    # hard in 0 of 3 topics - under 30%
+    _performance((80, 70, 0), (60, 50, 0), (90, 80, 0)),
+    # every difficulty attempted everywhere
+    _performance((80, 70, 60), (60, 50, 40)),
+])
+def test_summary_signals_match_original_checks(topic_performance):
+    signals = AdaptiveQuizService()._summarize_topic_performance(topic_performance)
+    assert signals == _old_signals(topic_performance)
+    for data in topic_performance.values():
+        attempted = [data[d] for d in ("easy", "medium", "hard") if data[d] > 0]
+        assert data["total_accuracy"] == (sum(attempted) / len(attempted) if attempted else 0)
+
+@pytest.mark.parametrize("rows, strategy", [
+    ([("Polity", "easy", 10, 4, 40)], "remedial"),
+    # 60% overall, easy-heavy with gaps
+    ([("Polity", "easy", 10, 6, 60), ("Science", "easy", 10, 6, 60)], "exploration"),
+    # 60% overall, medium and hard attempted everywhere
+    ([("Polity", "easy", 10, 6, 60), ("Polity", "medium", 10, 6, 60), ("Polity", "hard", 10, 6, 60)], "balanced"),
+    ([("Polity", "easy", 10, 9, 90)], "exploration"),
+    ([("Polity", "easy", 10, 9, 90), ("Polity", "medium", 10, 8, 80), ("Polity", "hard", 10, 8, 80)], "advanced"),
+])
+def test_analyze_user_progress_strategy(rows, strategy):
+    progress = [
+        {"topic": topic, "difficulty": difficulty, "attempts": attempts, "correct": correct, "accuracy": accuracy}
+        for topic, difficulty, attempts, correct, accuracy in rows
+    ]
+    assert AdaptiveQuizService().analyze_user_progress(progress)["strategy"] == strategy
+
+def test_topics_are_cached_until_invalidated(monkeypatch):
+    calls = []
+
+    def facet(collection_name, key, limit):
+        calls.append(limit)
+        return SimpleNamespace(hits=[SimpleNamespace(value=t) for t in ("Science", "Polity")])
+
+    monkeypatch.setattr(aqs, "qdrant_client", SimpleNamespace(facet=facet))
+    service = AdaptiveQuizService()
+
+    assert service.get_all_available_topics() == ["Polity", "Science"]
+    assert service.get_all_available_topics() == ["Polity", "Science"]
+    assert calls == [aqs.TOPIC_FACET_LIMIT]
+
+    service.invalidate_topics_cache()
+    service.get_all_available_topics()
+    assert len(calls) == 2
+
+    monkeypatch.setattr(aqs, "TOPICS_CACHE_TTL", -1)
+    service.invalidate_topics_cache()
+    service.get_all_available_topics()
+    service.get_all_available_topics()
+    assert len(calls) == 4
@@ -0,0 +1,26 @@
+from src.agents import analysis_cache
+from src.agents.analysis_cache import (
+    get_cached_analysis,
+    set_cached_analysis,
+    invalidate_user_analysis,
+)
+
+TEST_EMAIL = "as4195@gmail.com"
+
+def teardown_function():
+    invalidate_user_analysis(TEST_EMAIL)
+
+def test_cache_hit_and_invalidation():
+    result = {"topic_stats": {}, "summary": "ok"}
+    set_cached_analysis("analyze_user", TEST_EMAIL, 0, result)
+    assert get_cached_analysis("analyze_user", TEST_EMAIL, 0) == result
+    assert get_cached_analysis("analyze_user", TEST_EMAIL, None) is None
+    assert get_cached_analysis("run_agent", TEST_EMAIL, 0) is None
+
+    invalidate_user_analysis(TEST_EMAIL)
+    assert get_cached_analysis("analyze_user", TEST_EMAIL, 0) is None
+
+def test_expired_entry_is_ignored(monkeypatch):
+    monkeypatch.setattr(analysis_cache, "ANALYSIS_CACHE_TTL", -1)
+    set_cached_analysis("analyze_user", TEST_EMAIL, 0, {"summary": "stale"})
+    assert get_cached_analysis("analyze_user", TEST_EMAIL, 0) is None
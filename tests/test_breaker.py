@@ -0,0 +1,28 @@
+import pytest
+
+from src.services import breaker as breaker_module
+from src.services.breaker import CircuitBreaker, CircuitOpenError
+
+def test_opens_after_consecutive_failures_and_recovers(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(breaker_module.time, "monotonic", lambda: now[0])
+    cb = CircuitBreaker("gemini", fail_max=2, reset_timeout=30)
+
+    cb.record_failure()
+    cb.check()  # one failure - still closed
+    cb.record_failure()
+    with pytest.raises(CircuitOpenError):
+        cb.check()
+
+    now[0] += 31
+    cb.check()  # reset timeout elapsed - calls go through again
+    cb.record_success()
+    cb.record_failure()
+    cb.check()  # success reset the failure count
+
+def test_success_resets_failure_count():
+    cb = CircuitBreaker("gemini", fail_max=2, reset_timeout=30)
+    cb.record_failure()
+    cb.record_success()
+    cb.record_failure()
+    assert not cb.is_open
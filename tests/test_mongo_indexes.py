@@ -0,0 +1,55 @@
+import pytest
+from pymongo.errors import OperationFailure
+
+from src.db import mongo_utils, quiz_session_utils
+
+class FakeCollection:
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.created = []
+
+    def _create(self, name):
+        error = self.errors.pop(0) if self.errors else None
+        if error:
+            raise error
+        self.created.append(name)
+
+    def create_indexes(self, indexes):
+        for index in indexes:
+            self._create(index.document["name"])
+
+    def create_index(self, keys, **kwargs):
+        self._create(kwargs["name"])
+
+def _fake_db(monkeypatch, module, name, collection):
+    monkeypatch.setattr(module, "get_db", lambda: {name: collection})
+    monkeypatch.setattr(module, "_indexes_ensured", False)
+
+def test_existing_equivalent_index_counts_as_ensured(monkeypatch):
+    collection = FakeCollection([OperationFailure("conflict", code=85)])
+    _fake_db(monkeypatch, quiz_session_utils, quiz_session_utils.COLLECTION_NAME, collection)
+
+    assert quiz_session_utils.get_quiz_sessions_collection() is collection
+    assert collection.created == ["email_created_at"]  # the conflict didn't skip the other index
+    assert quiz_session_utils._indexes_ensured
+
+def test_failed_index_build_raises_and_is_retried(monkeypatch):
+    collection = FakeCollection([OperationFailure("duplicate key", code=11000)])
+    _fake_db(monkeypatch, mongo_utils, mongo_utils.USER_COLLECTION_NAME, collection)
+
+    with pytest.raises(OperationFailure):
+        mongo_utils.get_user_by_email("someone@example.com")
+    assert not mongo_utils._indexes_ensured
+
+    collection.find_one = lambda query, projection=None: None
+    assert mongo_utils.get_user_by_email("someone@example.com") is None
+    assert collection.created == ["email_unique"]
+    assert mongo_utils._indexes_ensured
+
+def test_login_upsert_ensures_the_unique_email_index(monkeypatch):
+    collection = FakeCollection([])
+    collection.find_one_and_update = lambda *args, **kwargs: {"email": "someone@example.com"}
+    _fake_db(monkeypatch, mongo_utils, mongo_utils.USER_COLLECTION_NAME, collection)
+
+    quiz_session_utils.create_or_update_user("someone@example.com", "Someone", "Polity", 7)
+    assert collection.created == ["email_unique"]
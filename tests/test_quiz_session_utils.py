@@ -37,7 +37,8 @@ def test_get_or_create_today_session():
 
 def test_mark_quiz_completed():
     session = get_or_create_today_session(TEST_EMAIL)
-    mark_quiz_completed(TEST_EMAIL, session["day"])
+    returned = mark_quiz_completed(TEST_EMAIL, session["day"])
+    assert returned["completed"] is True
     updated = quiz_sessions_collection.find_one({"email": TEST_EMAIL, "day": session["day"]})
     assert updated["completed"] is True
     assert "completed_at" in updated
@@ -0,0 +1,37 @@
+import numpy as np
+
+from src.services.semantic_cache import SemanticCache
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+def test_near_duplicate_hits_and_namespaces_are_separate():
+    cache = SemanticCache(threshold=0.95, ttl=60, max_entries=4, dim=3)
+    cache.store("query:False", _unit([1, 0, 0]), {"response": {"a": 1}})
+
+    assert cache.lookup("query:False", _unit([1, 0.05, 0])) == {"response": {"a": 1}}
+    assert cache.lookup("query:False", _unit([0, 1, 0])) is None
+    assert cache.lookup("query:True", _unit([1, 0, 0])) is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+
+def test_expired_and_evicted_entries_miss():
+    cache = SemanticCache(threshold=0.95, ttl=-1, max_entries=2, dim=3)
+    cache.store("ns", _unit([1, 0, 0]), "stale")
+    assert cache.lookup("ns", _unit([1, 0, 0])) is None
+
+    cache.ttl = 60
+    cache.store("ns", _unit([1, 0, 0]), "first")
+    cache.store("ns", _unit([0, 1, 0]), "second")
+    cache.store("ns", _unit([0, 0, 1]), "third")  # overwrites "first"
+    assert cache.lookup("ns", _unit([1, 0, 0])) is None
+    assert cache.lookup("ns", _unit([0, 0, 1])) == "third"
+
+def test_invalidate_drops_every_entry():
+    cache = SemanticCache(threshold=0.95, ttl=60, max_entries=4, dim=3)
+    cache.store("ns", _unit([1, 0, 0]), "value")
+    cache.invalidate()
+    assert cache.lookup("ns", _unit([1, 0, 0])) is None
+    assert cache.stats()["entries"] == 0
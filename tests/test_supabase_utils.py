@@ -0,0 +1,47 @@
+import time
+from types import SimpleNamespace
+
+import jwt
+
+from src.db import supabase_utils
+from src.db.supabase_utils import SupabaseManager
+
+def _token(exp):
+    return jwt.encode({"sub": "user-1", "exp": int(exp)}, "test-secret-that-is-at-least-32-bytes", algorithm="HS256")
+
+def _manager(monkeypatch):
+    created = []
+
+    def fake_create_client(supabase_url, supabase_key):
+        client = SimpleNamespace(auth=SimpleNamespace(set_session=lambda access, refresh: None))
+        created.append(client)
+        return client
+
+    monkeypatch.setenv("SUPABASE_URL", "https://example.supabase.co")
+    monkeypatch.setenv("SUPABASE_ANON_KEY", "anon")
+    monkeypatch.setattr(supabase_utils, "create_client", fake_create_client)
+    return SupabaseManager(), created
+
+def test_expired_token_client_is_not_cached(monkeypatch):
+    manager, created = _manager(monkeypatch)
+    token = _token(time.time() - 10)
+
+    manager._get_auth_client(token)
+    manager._get_auth_client(token)
+    assert len(created) == 3  # anon client + one per call
+    assert token not in manager._auth_clients
+
+def test_short_lived_token_expires_with_the_token(monkeypatch):
+    manager, created = _manager(monkeypatch)
+    token = _token(time.time() + 5)
+
+    first = manager._get_auth_client(token)
+    assert manager._get_auth_client(token) is first
+    assert manager._auth_clients[token][1] <= time.monotonic() + 5
+
+def test_long_lived_token_is_capped_by_ttl(monkeypatch):
+    manager, created = _manager(monkeypatch)
+    token = _token(time.time() + 3600)
+
+    manager._get_auth_client(token)
+    assert manager._auth_clients[token][1] <= time.monotonic() + supabase_utils.AUTH_CLIENT_TTL